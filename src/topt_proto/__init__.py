@@ -12,6 +12,41 @@ from .gadgetisation import (
     get_clifford_boundary,
     REPLACE_CONDITIONALS,
 )
+from .front_end import REBASE_TO_PHASE_POLY, rebase_to_phase_poly
+from .incremental import (
+    IncrementalCompiler,
+    get_box_fingerprint,
+    get_pauli_fingerprint,
+)
+from .hadamard_reduction import (
+    MINIMISE_HADAMARDS,
+    minimise_hadamards,
+    minimise_hadamards_with_counts,
+)
+from .phase_polynomial import (
+    get_linear_transformation_rows,
+    get_sparse_phase_polynomial,
+    get_t_count,
+    indices_to_mask,
+    mask_to_indices,
+    mask_to_parity,
+    parity_to_mask,
+    phase_poly_box_from_parities,
+)
+from .verification import (
+    check_gadgetisation_statevector,
+    check_gadgetisation_tableau,
+    get_clifford_tableau,
+    get_pauli_conjugate_tableau,
+    verify_clifford_synthesis,
+)
+from .steiner import (
+    get_placement,
+    get_steiner_phase_gadget_circuit,
+    place_circuit,
+    steiner_gauss,
+)
+from .symbolic import CliffordTemplate, bind_circuit
 from .utils import (
     check_phasepolybox,
     check_rz_angles,
@@ -40,4 +75,31 @@ __all__ = [
     "tensor_from_x_index",
     "REPLACE_T_WITH_RZ",
     "REPLACE_CONDITIONALS",
+    "MINIMISE_HADAMARDS",
+    "minimise_hadamards",
+    "minimise_hadamards_with_counts",
+    "CliffordTemplate",
+    "bind_circuit",
+    "get_clifford_tableau",
+    "get_pauli_conjugate_tableau",
+    "verify_clifford_synthesis",
+    "check_gadgetisation_statevector",
+    "check_gadgetisation_tableau",
+    "get_linear_transformation_rows",
+    "get_sparse_phase_polynomial",
+    "get_t_count",
+    "indices_to_mask",
+    "mask_to_indices",
+    "mask_to_parity",
+    "parity_to_mask",
+    "phase_poly_box_from_parities",
+    "REBASE_TO_PHASE_POLY",
+    "rebase_to_phase_poly",
+    "IncrementalCompiler",
+    "get_box_fingerprint",
+    "get_pauli_fingerprint",
+    "get_placement",
+    "get_steiner_phase_gadget_circuit",
+    "place_circuit",
+    "steiner_gauss",
 ]
@@ -1,13 +1,30 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+
 from pytket import Qubit
 from pytket._tket.circuit import Circuit, OpType, PauliExpCommutingSetBox
+from pytket.architecture import Architecture
 from pytket.circuit import PhasePolyBox
 from pytket.extensions.qiskit import qiskit_to_tk
 from pytket.passes import DecomposeBoxes
 from pytket.pauli import Pauli, QubitPauliTensor
 from pytket.tableau import UnitaryTableau
 from qiskit.synthesis import synth_cnot_count_full_pmh
+from sympy import Expr
+from topt_proto.phase_polynomial import (
+    get_linear_transformation_rows,
+    get_sparse_phase_polynomial,
+    mask_to_indices,
+)
+from topt_proto.steiner import (
+    Placement,
+    get_adjacency,
+    get_steiner_phase_gadget_circuit,
+    place_circuit,
+    steiner_gauss,
+)
+from topt_proto.verification import verify_clifford_synthesis
 
 ### Background discussed here
 #  -> https://quantumcomputing.stackexchange.com/questions/39930/resynthesising-a-clifford-from-a-phase-polynomial-and-a-pauli-string
@@ -20,17 +37,33 @@ PAULI_DICT = {
 }
 
 
-def pauli_tensor_to_circuit(pauli_tensor: QubitPauliTensor) -> Circuit:
+def pauli_tensor_to_circuit(
+    pauli_tensor: QubitPauliTensor,
+    n_qubits: int | None = None,
+) -> Circuit:
     """Create a Circuit comprised of single qubit Pauli ops from a QubitPauliTensor."""
-    pauli_circ = Circuit(len(pauli_tensor.string.to_list()))
+    # Identities may be missing from the tensor, so allow the width to be given.
+    if n_qubits is None:
+        n_qubits = len(pauli_tensor.string.to_list())
+    pauli_circ = Circuit(n_qubits)
     for qubit, pauli_op in pauli_tensor.string.map.items():
         pauli_circ.add_gate(PAULI_DICT[pauli_op], [qubit])
 
     return pauli_circ
 
 
-def get_cnot_circuit(pbox: PhasePolyBox) -> Circuit:
+def get_cnot_circuit(
+    pbox: PhasePolyBox,
+    architecture: Architecture | None = None,
+    placement: Placement | None = None,
+) -> Circuit:
     """Generate a CNOT circuit implementing the linear reversible circuit L."""
+    # With an Architecture, qubit i is on node placement[i] (see steiner.py).
+    if architecture is not None:
+        adjacency = get_adjacency(architecture, pbox.n_qubits, placement)
+        cnot_circ = steiner_gauss(get_linear_transformation_rows(pbox), adjacency)
+        return place_circuit(cnot_circ, architecture, placement)
+
     # cheat by synthesising the CNOT circuit with qiskit and converting
     qc = synth_cnot_count_full_pmh(pbox.linear_transformation, section_size=2)
     tkc_cnot: Circuit = qiskit_to_tk(qc)
@@ -51,56 +84,90 @@ def get_pauli_conjugate(
     return l_tableau.get_row_product(input_pauli)
 
 
-def _parities_to_pauli_tensors(pbox: PhasePolyBox) -> list[QubitPauliTensor]:
-    phase_poly = pbox.phase_polynomial
+def _parities_to_pauli_tensors(
+    pbox: PhasePolyBox,
+) -> tuple[list[int], list[QubitPauliTensor], list[Expr | float]]:
+    # The tensors are sparse, only the qubits in the parity get a Pauli.Z.
+    #  Numerical phases are the coefficients of the tensors, as before. A
+    #  tensor coefficient can not be symbolic, so the phases are also returned
+    #  separately and those are the ones synthesise_clifford uses.
+    parities: list[int] = []
     tensor_list: list[QubitPauliTensor] = []
-    for parity, phase in phase_poly.items():
-        assert isinstance(phase, float)
-        pauli_list: list[Pauli] = []
-        qubit_list: list[Qubit] = []
-        for count, boolean in enumerate(parity):
-            qubit_list.append(Qubit(count))
-            if boolean is True:
-                pauli_list.append(Pauli.Z)
-            else:
-                pauli_list.append(Pauli.I)
-
+    phases: list[Expr | float] = []
+    for parity, phase in get_sparse_phase_polynomial(pbox).items():
         pauli_tensor = QubitPauliTensor(
-            qubits=qubit_list,
-            paulis=pauli_list,
-            coeff=phase,
+            {Qubit(index): Pauli.Z for index in mask_to_indices(parity)},
+            coeff=phase if isinstance(phase, float) else 1.0,
         )
+        parities.append(parity)
         tensor_list.append(pauli_tensor)
+        phases.append(phase)
 
-    return tensor_list
+    return parities, tensor_list, phases
 
 
-def get_updated_paulis(
+def _get_anticommuting(
     pauli_tensors: list[QubitPauliTensor],
     new_pauli: QubitPauliTensor,
-) -> list[QubitPauliTensor]:
+) -> list[bool]:
+    return [not tensor.commutes_with(new_pauli) for tensor in pauli_tensors]
 
-    new_tensors: list[QubitPauliTensor] = []
 
-    for pauli_op in pauli_tensors:
-        if not pauli_op.commutes_with(new_pauli):
-            new_coeff = pauli_op.coeff * (-2)
-            new_tensors.append(
-                QubitPauliTensor(string=pauli_op.string, coeff=new_coeff),
-            )
+def get_updated_paulis(
+    pauli_tensors: list[QubitPauliTensor],
+    new_pauli: QubitPauliTensor,
+) -> list[QubitPauliTensor]:
+    """Return the tensors which anticommute with P', with their coefficients multiplied by -2."""
+    anticommuting = _get_anticommuting(pauli_tensors, new_pauli)
+    return [
+        QubitPauliTensor(string=pauli_op.string, coeff=pauli_op.coeff * (-2))
+        for pauli_op, flag in zip(pauli_tensors, anticommuting, strict=True)
+        if flag
+    ]
 
-    return new_tensors
 
+def _get_phase_gadget_circuit(
+    pauli_tensors: list[QubitPauliTensor],
+    phases: Sequence[Expr | float] | None = None,
+    n_qubits: int | None = None,
+    architecture: Architecture | None = None,
+    placement: Placement | None = None,
+) -> Circuit:
+    # The phases default to the (real) coefficients of the tensors. They can
+    #  be given separately to build the gadgets with symbolic angles.
+    if phases is None:
+        phases = [tensor.coeff.real for tensor in pauli_tensors]
+
+    # The tensors may be sparse, but PauliExpCommutingSetBox needs dense lists.
+    if n_qubits is None:
+        n_qubits = 1 + max(
+            qubit.index[0] for tensor in pauli_tensors for qubit in tensor.string.map
+        )
 
-def _get_phase_gadget_circuit(pauli_tensors: list[QubitPauliTensor]) -> Circuit:
-    pauli_ops: list[tuple[list[Pauli], float]] = []
-    for tensor in pauli_tensors:
-        pauli_list = list(tensor.string.map.values())
-        pair: tuple[list[Pauli], float] = (pauli_list, tensor.coeff.real)
+    # The Q sequence only has {Z, I} tensors, which are built as phase
+    #  gadgets on Steiner trees of the Architecture.
+    if architecture is not None:
+        parities: list[int] = []
+        for tensor in pauli_tensors:
+            parity = 0
+            for qubit, pauli in tensor.string.map.items():
+                if pauli not in (Pauli.I, Pauli.Z):
+                    msg = f"Only Z phase gadgets can be placed on an Architecture, got {tensor}."
+                    raise ValueError(msg)
+                if pauli == Pauli.Z:
+                    parity |= 1 << qubit.index[0]
+            parities.append(parity)
+        adjacency = get_adjacency(architecture, n_qubits, placement)
+        return get_steiner_phase_gadget_circuit(parities, phases, adjacency)
+
+    pauli_ops: list[tuple[list[Pauli], Expr | float]] = []
+    for tensor, phase in zip(pauli_tensors, phases):
+        pauli_map = tensor.string.map
+        pauli_list = [pauli_map.get(Qubit(n), Pauli.I) for n in range(n_qubits)]
+        pair: tuple[list[Pauli], Expr | float] = (pauli_list, phase)
         pauli_ops.append(pair)
 
     pauli_gadgets_sequence = PauliExpCommutingSetBox(pauli_ops)
-    n_qubits = pauli_gadgets_sequence.n_qubits
 
     pauli_gadget_circ = Circuit(n_qubits).add_gate(
         pauli_gadgets_sequence,
@@ -111,27 +178,87 @@ def _get_phase_gadget_circuit(pauli_tensors: list[QubitPauliTensor]) -> Circuit:
     return pauli_gadget_circ
 
 
-def synthesise_clifford(pbox: PhasePolyBox, input_pauli: QubitPauliTensor) -> Circuit:
-    """Synthesise a Circuit implementing the end of Circuit Clifford Operator C."""
+def _get_q_sequence(
+    pbox: PhasePolyBox,
+    new_pauli: QubitPauliTensor,
+) -> tuple[list[int], list[bool], list[QubitPauliTensor], list[Expr | float]]:
+    """Return the parities of D, which anticommute with P', and the Q sequence with its angles."""
+    parities, d_sequence, phases = _parities_to_pauli_tensors(pbox)
+
+    # The angles are updated as in get_updated_paulis, but from the separate
+    #  phases so that they may be symbolic.
+    anticommuting = _get_anticommuting(d_sequence, new_pauli)
+    q_sequence = get_updated_paulis(d_sequence, new_pauli)
+    q_phases = [
+        phase * (-2) for phase, flag in zip(phases, anticommuting, strict=True) if flag
+    ]
+    return parities, anticommuting, q_sequence, q_phases
 
-    # Get P' = L * P * L†
-    new_pauli: QubitPauliTensor = get_pauli_conjugate(pbox, input_pauli)
 
+def _get_clifford_circuit(
+    new_pauli: QubitPauliTensor,
+    q_sequence: list[QubitPauliTensor],
+    q_phases: Sequence[Expr | float],
+    n_qubits: int,
+    architecture: Architecture | None = None,
+    placement: Placement | None = None,
+) -> Circuit:
     # Create a Circuit with the Pauli tensor P'
-    pauli_circ: Circuit = pauli_tensor_to_circuit(new_pauli)
+    pauli_circ: Circuit = pauli_tensor_to_circuit(new_pauli, n_qubits)
+
+    # Get a circuit to implement the Q operator sequence (if non-empty)
+    if q_sequence:
+        operator_circ: Circuit = _get_phase_gadget_circuit(
+            q_sequence,
+            q_phases,
+            n_qubits=n_qubits,
+            architecture=architecture,
+            placement=placement,
+        )
+
+        # Combine circuits for P' and Q
+        pauli_circ.append(operator_circ)
+
+    return pauli_circ
+
 
-    # Get a list of Pauli {Z, I} tensors for D
-    d_sequence: list[QubitPauliTensor] = _parities_to_pauli_tensors(pbox)
+def synthesise_clifford(
+    pbox: PhasePolyBox,
+    input_pauli: QubitPauliTensor,
+    verify: bool = False,
+    architecture: Architecture | None = None,
+    placement: Placement | None = None,
+) -> Circuit:
+    """Synthesise a Circuit implementing the end of Circuit Clifford Operator C.
+
+    With an Architecture the Circuit acts on the nodes given by placement.
+    """
+
+    # Get P' = L * P * L†
+    new_pauli: QubitPauliTensor = get_pauli_conjugate(pbox, input_pauli)
 
-    # Get Q sequence
-    q_sequence: list[QubitPauliTensor] = get_updated_paulis(
-        d_sequence,
+    # Get the Q sequence, its angles may be symbolic.
+    _, _, q_sequence, q_phases = _get_q_sequence(pbox, new_pauli)
+
+    pauli_circ = _get_clifford_circuit(
         new_pauli,
+        q_sequence,
+        q_phases,
+        pbox.n_qubits,
+        architecture,
+        placement,
     )
 
-    # Get a circuit to implement the Q operator sequence
-    operator_circ: Circuit = _get_phase_gadget_circuit(q_sequence)
-
-    # Combine circuits for P' and Q
-    pauli_circ.append(operator_circ)
+    # Optional self-check of C against U† P U using Clifford tableaux, this
+    #  needs numeric angles.
+    if verify and pauli_circ.free_symbols():
+        msg = "Can not verify a synthesis with free symbols, bind them first."
+        raise ValueError(msg)
+    if verify and not verify_clifford_synthesis(pbox, input_pauli, pauli_circ):
+        verify_msg = "Synthesised Circuit does not implement the Clifford operator."
+        raise RuntimeError(verify_msg)
+
+    # The Circuit is checked on qubit indices, then labelled with the nodes.
+    if architecture is not None:
+        return place_circuit(pauli_circ, architecture, placement)
     return pauli_circ
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from pytket import Qubit
+from pytket._tket.circuit import Circuit, OpType
+from pytket.passes import CustomPass
+from sympy import Expr
+from topt_proto.phase_polynomial import phase_poly_box_from_parities
+from topt_proto.utils import initialise_registers
+
+# Single pass conversion of a Clifford+T Circuit to the {H, PhasePolyBox}
+#  gateset expected by REPLACE_HADAMARDS. Each Hadamard-free region is built
+#  up directly as a linear map and a phase polynomial over packed bitsets
+#  (see phase_polynomial.py) rather than going through REPLACE_T_WITH_RZ,
+#  DecomposeBoxes and ComposePhasePolyBoxes.
+#
+# Pauli X gates are not phase polynomial gates, so they are kept in a frame
+#  which is pushed to the end of the Circuit. Only X gates left over at the
+#  very end are emitted, as H Z H.
+
+# Diagonal gates e^{iπθx}, which are e^{iπθ/2} Rz(θ).
+PHASE_GATE_ANGLES = {
+    OpType.T: 0.25,
+    OpType.Tdg: -0.25,
+    OpType.S: 0.5,
+    OpType.Sdg: -0.5,
+    OpType.Z: 1.0,
+}
+
+FRONT_END_GATES = {
+    *PHASE_GATE_ANGLES,
+    OpType.Rz,
+    OpType.U1,
+    OpType.X,
+    OpType.H,
+    OpType.CX,
+    OpType.CZ,
+    OpType.SWAP,
+    OpType.noop,
+    OpType.Phase,
+    OpType.Barrier,
+}
+
+
+class _PhasePolyRegion:
+    """Linear map and phase polynomial of the current Hadamard-free region."""
+
+    def __init__(self) -> None:
+        # Qubit i of the region has input variable i. rows[qubit] is the
+        #  parity of the input variables held by that qubit.
+        self.qubits: list[Qubit] = []
+        self.rows: dict[Qubit, int] = {}
+        self.phases: dict[int, Expr | float] = {}
+
+    def row(self, qubit: Qubit) -> int:
+        if qubit not in self.rows:
+            self.rows[qubit] = 1 << len(self.qubits)
+            self.qubits.append(qubit)
+        return self.rows[qubit]
+
+    def add_phase(self, parity: int, angle: Expr | float) -> None:
+        phase = self.phases.get(parity, 0.0) + angle
+        if phase == 0:
+            self.phases.pop(parity, None)
+        else:
+            self.phases[parity] = phase
+
+    def acts_on(self, qubit: Qubit) -> bool:
+        # A qubit is acted on unless it keeps its own input variable and that
+        #  variable appears in no other row and no parity.
+        if qubit not in self.rows:
+            return False
+        variable = 1 << self.qubits.index(qubit)
+        if self.rows[qubit] != variable:
+            return True
+        if any(row & variable for q, row in self.rows.items() if q != qubit):
+            return True
+        return any(parity & variable for parity in self.phases)
+
+    def flush(self, circ: Circuit) -> None:
+        if self.phases or any(
+            self.rows[qubit] != 1 << index for index, qubit in enumerate(self.qubits)
+        ):
+            pbox = phase_poly_box_from_parities(
+                len(self.qubits),
+                self.phases,
+                [self.rows[qubit] for qubit in self.qubits],
+            )
+            circ.add_gate(pbox, self.qubits)
+        self.qubits = []
+        self.rows = {}
+        self.phases = {}
+
+
+def _add_phase_gate(
+    region: _PhasePolyRegion,
+    qubit: Qubit,
+    angle: Expr | float,
+    x_frame: set[Qubit],
+) -> None:
+    # Rz(θ) X = X Rz(-θ), so the angle flips sign if there is an X in the frame.
+    if qubit in x_frame:
+        angle = -angle
+    region.add_phase(region.row(qubit), angle)
+
+
+def _add_cz(
+    region: _PhasePolyRegion,
+    a: Qubit,
+    b: Qubit,
+    x_frame: set[Qubit],
+) -> None:
+    # CZ = e^{iπ x_a x_b} with x_a x_b = (x_a + x_b - (x_a ⊕ x_b)) / 2, which
+    #  is e^{iπ/4} Rz(1/2) Rz(1/2) Rz(-1/2) on the parities a, b and a ⊕ b.
+    #  As for single qubit phases, an X in the frame flips the sign of the
+    #  angle on every parity it anticommutes with.
+    row_a, row_b = region.row(a), region.row(b)
+    a_flipped, b_flipped = a in x_frame, b in x_frame
+    region.add_phase(row_a, -0.5 if a_flipped else 0.5)
+    region.add_phase(row_b, -0.5 if b_flipped else 0.5)
+    region.add_phase(row_a ^ row_b, 0.5 if a_flipped != b_flipped else -0.5)
+
+
+def rebase_to_phase_poly(circ: Circuit) -> Circuit:
+    """Convert a Clifford+T Circuit to the {H, PhasePolyBox} gateset in a single pass."""
+    circ_prime = initialise_registers(circ)
+    region = _PhasePolyRegion()
+    x_frame: set[Qubit] = set()
+    global_phase = circ.phase
+
+    for cmd in circ:
+        op_type = cmd.op.type
+        qubits = cmd.qubits
+        if op_type not in FRONT_END_GATES:
+            msg = f"Front end not implemented for {op_type}."
+            raise NotImplementedError(msg)
+
+        match op_type:
+            case OpType.T | OpType.Tdg | OpType.S | OpType.Sdg | OpType.Z:
+                angle = PHASE_GATE_ANGLES[op_type]
+                global_phase += angle / 2
+                _add_phase_gate(region, qubits[0], angle, x_frame)
+            case OpType.Rz:
+                _add_phase_gate(region, qubits[0], cmd.op.params[0], x_frame)
+            case OpType.U1:
+                global_phase += cmd.op.params[0] / 2
+                _add_phase_gate(region, qubits[0], cmd.op.params[0], x_frame)
+            case OpType.X:
+                x_frame ^= {qubits[0]}
+            case OpType.CX:
+                control, target = qubits
+                # X_c CX = CX X_c X_t
+                if control in x_frame:
+                    x_frame ^= {target}
+                region.rows[target] = region.row(target) ^ region.row(control)
+            case OpType.CZ:
+                _add_cz(region, qubits[0], qubits[1], x_frame)
+                global_phase += 0.25
+            case OpType.SWAP:
+                a, b = qubits
+                row_a, row_b = region.row(a), region.row(b)
+                region.rows[a], region.rows[b] = row_b, row_a
+                if (a in x_frame) != (b in x_frame):
+                    x_frame ^= {a, b}
+            case OpType.H:
+                qubit = qubits[0]
+                # If the region acts trivially on the qubit the Hadamard
+                #  commutes with it, otherwise the region is closed off.
+                if region.acts_on(qubit):
+                    region.flush(circ_prime)
+                circ_prime.H(qubit)
+                # X H = H Z
+                if qubit in x_frame:
+                    x_frame.remove(qubit)
+                    region.add_phase(region.row(qubit), 1.0)
+                    global_phase += 0.5
+            case OpType.Phase:
+                global_phase += cmd.op.params[0]
+            case OpType.noop | OpType.Barrier:
+                pass
+
+    region.flush(circ_prime)
+
+    # Any X gates left in the frame are added as H Z H.
+    if x_frame:
+        frame_qubits = sorted(x_frame)
+        for qubit in frame_qubits:
+            circ_prime.H(qubit)
+            region.add_phase(region.row(qubit), 1.0)
+            global_phase += 0.5
+        region.flush(circ_prime)
+        for qubit in frame_qubits:
+            circ_prime.H(qubit)
+
+    circ_prime.add_phase(global_phase)
+    return circ_prime
+
+
+REBASE_TO_PHASE_POLY = CustomPass(rebase_to_phase_poly)
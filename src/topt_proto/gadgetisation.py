@@ -50,7 +50,12 @@ def _count_hadamards(commands: list[Command]) -> int:
 # As its possible for a PhasePolyBox to be Clifford, we handle
 # this case. TODO: Maybe clean this up.
 def get_clifford_boundary(circ: Circuit) -> tuple[int, int]:
-    phase_poly_boxes = circ.ops_of_type(OpType.PhasePolyBox)
+    # Boxes are taken in command order, which is the order gadgetise_hadamards
+    #  counts them in (Circuit.ops_of_type does not follow it).
+    phase_poly_boxes = [cmd.op for cmd in circ if cmd.op.type == OpType.PhasePolyBox]
+    if all(box.is_clifford() for box in phase_poly_boxes):
+        msg = "Circuit must contain a non-Clifford PhasePolyBox."
+        raise ValueError(msg)
     first_index = next(
         count for count, box in enumerate(phase_poly_boxes) if not box.is_clifford()
     )
@@ -67,20 +72,24 @@ def get_clifford_boundary(circ: Circuit) -> tuple[int, int]:
 # Note that this pass assumes that we are in the {H, PhasePolyBox} gateset
 #  (hence the HADAMARD_REPLACE_PREDICATE). Circuits not in this gateset can
 # be converted to it by applying the ComposePhasePolyBoxes pass.
-def gadgetise_hadamards(circ: Circuit) -> Circuit:
+def gadgetise_hadamards(circ: Circuit, deferred_measurement: bool = False) -> Circuit:
     """Replace all internal Hadamard gates with measurement gadgets."""
+    # With deferred_measurement the classically controlled X of each gadget
+    #  is emitted directly as a CX from the ancilla, giving the same Circuit as
+    #  replace_conditionals(gadgetise_hadamards(circ)) in a single pass.
     internal_h_count = get_n_internal_hadamards(circ)
+    lower, upper = get_clifford_boundary(circ)
 
     circ_prime = Circuit(circ.n_qubits)
     z_ancillas = circ_prime.add_q_register("z_ancillas", internal_h_count)
-    ancilla_bits = circ_prime.add_c_register("bits", internal_h_count)
+    if not deferred_measurement:
+        ancilla_bits = circ_prime.add_c_register("bits", internal_h_count)
 
     for ancilla in z_ancillas:
         circ_prime.H(ancilla)
 
     circ_prime.add_barrier(list(z_ancillas))
 
-    lower, upper = get_clifford_boundary(circ)
     ancilla_index = 0
     box_counter = 0
     for cmd in circ:
@@ -95,19 +104,25 @@ def gadgetise_hadamards(circ: Circuit) -> Circuit:
                 circ_prime.add_gate(FSWAP, [cmd.qubits[0], z_ancillas[ancilla_index]])
                 # Measure the ancilla qubit in the X basis.
                 circ_prime.add_gate(OpType.H, [z_ancillas[ancilla_index]])
-                circ_prime.Measure(
-                    z_ancillas[ancilla_index], ancilla_bits[ancilla_index]
-                )
-                circ_prime.X(
-                    cmd.qubits[0],
-                    condition_bits=[ancilla_bits[ancilla_index]],
-                    condition_value=1,
-                )
+                if deferred_measurement:
+                    circ_prime.CX(z_ancillas[ancilla_index], cmd.qubits[0])
+                else:
+                    circ_prime.Measure(
+                        z_ancillas[ancilla_index], ancilla_bits[ancilla_index]
+                    )
+                    circ_prime.X(
+                        cmd.qubits[0],
+                        condition_bits=[ancilla_bits[ancilla_index]],
+                        condition_value=1,
+                    )
                 ancilla_index += 1
             else:
                 # If outside boundary, add Hadamard as usual.
                 circ_prime.add_gate(OpType.H, cmd.qubits)
 
+    if deferred_measurement:
+        # As in replace_conditionals.
+        circ_prime.remove_blank_wires()
     return circ_prime
 
 
@@ -117,10 +132,14 @@ REPLACE_HADAMARDS = CustomPass(gadgetise_hadamards)
 def replace_conditionals(circ: Circuit) -> Circuit:
     circ_prime = initialise_registers(circ)
 
+    # Several measurements can come before their conditionals in the command
+    #  order, so keep track of which qubit was measured into each bit.
+    measured_qubits = {}
+
     for cmd in circ:
         match cmd.op.type:
             case OpType.Measure:
-                control_qubit = cmd.qubits[0]
+                measured_qubits[cmd.bits[0]] = cmd.qubits[0]
                 continue
 
             case OpType.Conditional:
@@ -129,6 +148,7 @@ def replace_conditionals(circ: Circuit) -> Circuit:
                         f"Replacement not implemented for more than one condition bit ({cmd.op} has {cmd.op.width})."
                     )
                 if cmd.op.op.type == OpType.X:
+                    control_qubit = measured_qubits[cmd.args[0]]
                     target_qubit = cmd.qubits[0]
                     circ_prime.CX(control_qubit, target_qubit)
                 else:
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import numpy as np
+from pytket import Qubit
+from pytket._tket.circuit import Circuit, Command, Op, OpType, PhasePolyBox
+from pytket.passes import CustomPass, DecomposeBoxes
+from topt_proto.gadgetisation import (
+    HADAMARD_REPLACE_PREDICATE,
+    get_n_internal_hadamards,
+)
+from topt_proto.utils import initialise_registers
+
+# Each internal Hadamard costs an ancilla qubit, a measurement and a
+#  conditional correction once REPLACE_HADAMARDS is applied. The rewrites in
+#  this module act on the {H, PhasePolyBox} gateset and aim to reduce the
+#  number of internal Hadamards before gadgetisation.
+
+
+def _is_trivial_phase(phase: object) -> bool:
+    # Rz(4k) is the identity, symbolic phases are never treated as trivial.
+    return isinstance(phase, float) and abs(phase % 4) < 1e-10
+
+
+def _get_active_qubits(pbox: PhasePolyBox) -> list[int]:
+    linear_map = pbox.linear_transformation
+    active_qubits: set[int] = set()
+    for parity, phase in pbox.phase_polynomial.items():
+        if not _is_trivial_phase(phase):
+            active_qubits.update(i for i, boolean in enumerate(parity) if boolean)
+
+    for i in range(pbox.n_qubits):
+        unit_row = linear_map[i].sum() == 1 and linear_map[i, i]
+        unit_col = linear_map[:, i].sum() == 1 and linear_map[i, i]
+        if not (unit_row and unit_col):
+            active_qubits.add(i)
+
+    return sorted(active_qubits)
+
+
+def _restrict_box(pbox: PhasePolyBox, active_qubits: list[int]) -> PhasePolyBox:
+    phase_poly: dict[tuple[bool, ...], object] = {}
+    for parity, phase in pbox.phase_polynomial.items():
+        if not _is_trivial_phase(phase):
+            phase_poly[tuple(parity[i] for i in active_qubits)] = phase
+
+    linear_map = pbox.linear_transformation[np.ix_(active_qubits, active_qubits)]
+    n_qubits = len(active_qubits)
+    return PhasePolyBox(
+        n_qubits,
+        {Qubit(i): i for i in range(n_qubits)},
+        phase_poly,
+        np.asarray(linear_map, dtype=bool),
+    )
+
+
+def _compose_boxes(
+    first: tuple[Op, list[Qubit]],
+    second: tuple[Op, list[Qubit]],
+) -> tuple[Op, list[Qubit]]:
+    qubits = list(dict.fromkeys(first[1] + second[1]))
+    index_map = {qubit: Qubit(i) for i, qubit in enumerate(qubits)}
+    circ = Circuit(len(qubits))
+    for op, args in (first, second):
+        circ.add_gate(op, [index_map[qubit] for qubit in args])
+    DecomposeBoxes().apply(circ)
+    return PhasePolyBox(circ), qubits
+
+
+def _strip_idle_qubits(commands: list[Command]) -> list[tuple[Op, list[Qubit]]]:
+    # Remove the wires on which a PhasePolyBox acts as the identity,
+    #  dropping the box entirely if it acts trivially on every qubit.
+    gates: list[tuple[Op, list[Qubit]]] = []
+    for cmd in commands:
+        if cmd.op.type != OpType.PhasePolyBox:
+            gates.append((cmd.op, cmd.qubits))
+            continue
+        active_qubits = _get_active_qubits(cmd.op)
+        if len(active_qubits) == 0:
+            continue
+        if len(active_qubits) == cmd.op.n_qubits:
+            gates.append((cmd.op, cmd.qubits))
+        else:
+            gates.append(
+                (
+                    _restrict_box(cmd.op, active_qubits),
+                    [cmd.qubits[i] for i in active_qubits],
+                ),
+            )
+    return gates
+
+
+def _cancel_and_merge(
+    gates: list[tuple[Op, list[Qubit]]],
+    reverse: bool,
+) -> tuple[list[tuple[Op, list[Qubit]]], bool]:
+    # Single sweep over the gates (backwards if reverse=True). Adjacent
+    #  Hadamards on the same qubit are cancelled and a Clifford PhasePolyBox
+    #  is absorbed into the box directly before it in the sweep direction.
+    #  Absorbing into the neighbour in the sweep direction means that a
+    #  non-Clifford box is never moved past a Hadamard.
+    sweep = list(reversed(gates)) if reverse else list(gates)
+    output: list[tuple[Op, list[Qubit]] | None] = []
+    last_gates: dict[Qubit, list[int]] = {}
+    changed = False
+
+    for op, qubits in sweep:
+        stacks = [last_gates.setdefault(qubit, []) for qubit in qubits]
+        previous = {stack[-1] for stack in stacks if stack}
+
+        if op.type == OpType.H:
+            stack = stacks[0]
+            if stack and output[stack[-1]][0].type == OpType.H:
+                output[stack.pop()] = None
+                changed = True
+                continue
+
+        elif op.type == OpType.PhasePolyBox and len(previous) == 1:
+            index = previous.pop()
+            prev_op, prev_qubits = output[index]
+            if prev_op.type == OpType.PhasePolyBox and op.is_clifford():
+                if reverse:
+                    output[index] = _compose_boxes((op, qubits), (prev_op, prev_qubits))
+                else:
+                    output[index] = _compose_boxes((prev_op, prev_qubits), (op, qubits))
+                for qubit in output[index][1]:
+                    stack = last_gates.setdefault(qubit, [])
+                    if not stack:
+                        stack.append(index)
+                changed = True
+                continue
+
+        for stack in stacks:
+            stack.append(len(output))
+        output.append((op, qubits))
+
+    kept = [gate for gate in output if gate is not None]
+    if reverse:
+        kept.reverse()
+    return kept, changed
+
+
+def minimise_hadamards_with_counts(circ: Circuit) -> tuple[Circuit, int, int]:
+    """Reduce the number of internal Hadamards, returning the Circuit with the counts before and after."""
+    if not HADAMARD_REPLACE_PREDICATE.verify(circ):
+        pred_msg = "Circuit must contain only OpType.H and OpType.PhasePolyBox OpTypes."
+        raise ValueError(pred_msg)
+
+    n_before = get_n_internal_hadamards(circ)
+
+    gates = _strip_idle_qubits(circ.get_commands())
+    changed = True
+    while changed:
+        gates, forward_changed = _cancel_and_merge(gates, reverse=False)
+        gates, backward_changed = _cancel_and_merge(gates, reverse=True)
+        changed = forward_changed or backward_changed
+
+    circ_prime = initialise_registers(circ)
+    circ_prime.add_phase(circ.phase)
+    for op, qubits in gates:
+        circ_prime.add_gate(op, qubits)
+
+    n_after = get_n_internal_hadamards(circ_prime)
+
+    # Never hand back a Circuit which is worse than the one we were given.
+    if n_after > n_before:
+        return circ.copy(), n_before, n_before
+
+    return circ_prime, n_before, n_after
+
+
+def minimise_hadamards(circ: Circuit) -> Circuit:
+    """Cancel Hadamards and absorb Clifford PhasePolyBoxes to reduce the internal Hadamard count."""
+    circ_prime, _, _ = minimise_hadamards_with_counts(circ)
+    return circ_prime
+
+
+MINIMISE_HADAMARDS = CustomPass(minimise_hadamards)
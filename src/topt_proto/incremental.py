@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+from pytket._tket.circuit import Circuit
+from pytket.architecture import Architecture
+from pytket.circuit import PhasePolyBox
+from pytket.pauli import QubitPauliTensor
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.gadgetisation import gadgetise_hadamards
+from topt_proto.phase_polynomial import (
+    get_linear_transformation_rows,
+    get_sparse_phase_polynomial,
+)
+from topt_proto.steiner import Placement, get_placement
+
+# Compiler for Circuits which are edited and compiled again. Clifford
+#  syntheses are cached by the fingerprints of the PhasePolyBox and Pauli, in
+#  a least recently used cache of bounded size, together with the options of
+#  the synthesis. Gadgetisation is not cached, as it costs less than
+#  fingerprinting the boxes would, but REPLACE_HADAMARDS and
+#  REPLACE_CONDITIONALS are done in a single pass.
+
+
+def _hash_strings(strings: list[str]) -> str:
+    return hashlib.sha256("\n".join(strings).encode()).hexdigest()
+
+
+def get_box_fingerprint(pbox: PhasePolyBox) -> str:
+    """Return a hash of the phase polynomial and linear transformation of a PhasePolyBox."""
+    phase_polynomial = get_sparse_phase_polynomial(pbox)
+    strings = [f"n={pbox.n_qubits}"]
+    strings += [
+        f"{mask:x}:{phase!r}" for mask, phase in sorted(phase_polynomial.items())
+    ]
+    strings += [f"{row:x}" for row in get_linear_transformation_rows(pbox)]
+    return _hash_strings(strings)
+
+
+def get_pauli_fingerprint(pauli: QubitPauliTensor) -> str:
+    """Return a hash of a QubitPauliTensor, ignoring identities."""
+    strings = [f"c={pauli.coeff!r}"]
+    strings += sorted(
+        f"{qubit}:{p.name}" for qubit, p in pauli.string.map.items() if p.name != "I"
+    )
+    return _hash_strings(strings)
+
+
+def _get_target_fingerprint(
+    n_qubits: int,
+    architecture: Architecture | None,
+    placement: Placement | None,
+) -> str | None:
+    # The couplings of the placed nodes, which is all the synthesis depends on.
+    if architecture is None:
+        return None
+    placed_nodes = get_placement(architecture, n_qubits, placement)
+    strings = [str(node) for node in placed_nodes]
+    strings += sorted(f"{node_a}-{node_b}" for node_a, node_b in architecture.coupling)
+    return _hash_strings(strings)
+
+
+_SynthesisKey = tuple[str, str, bool, str | None]
+
+
+class IncrementalCompiler:
+    """Gadgetise Hadamards and synthesise Cliffords, reusing the syntheses of previous compiles."""
+
+    def __init__(self, max_synthesis_cache_size: int = 1024) -> None:
+        self._synthesis_cache: OrderedDict[_SynthesisKey, Circuit] = OrderedDict()
+        self._max_synthesis_cache_size = max_synthesis_cache_size
+
+        self.n_synthesis_hits: int = 0
+        self.n_synthesis_misses: int = 0
+
+    def clear(self) -> None:
+        """Forget all cached Clifford syntheses."""
+        self._synthesis_cache = OrderedDict()
+
+    def gadgetise(self, circ: Circuit) -> Circuit:
+        """Equivalent to applying REPLACE_HADAMARDS and then REPLACE_CONDITIONALS."""
+        return gadgetise_hadamards(circ, deferred_measurement=True)
+
+    def synthesise_clifford(
+        self,
+        pbox: PhasePolyBox,
+        input_pauli: QubitPauliTensor,
+        verify: bool = False,
+        architecture: Architecture | None = None,
+        placement: Placement | None = None,
+    ) -> Circuit:
+        """Cached synthesise_clifford, keyed on the contents of the PhasePolyBox and Pauli and the options."""
+        key = (
+            get_box_fingerprint(pbox),
+            get_pauli_fingerprint(input_pauli),
+            verify,
+            _get_target_fingerprint(pbox.n_qubits, architecture, placement),
+        )
+        if key in self._synthesis_cache:
+            self.n_synthesis_hits += 1
+            self._synthesis_cache.move_to_end(key)
+        else:
+            self.n_synthesis_misses += 1
+            self._synthesis_cache[key] = synthesise_clifford(
+                pbox,
+                input_pauli,
+                verify=verify,
+                architecture=architecture,
+                placement=placement,
+            )
+            if len(self._synthesis_cache) > self._max_synthesis_cache_size:
+                self._synthesis_cache.popitem(last=False)
+        return self._synthesis_cache[key].copy()
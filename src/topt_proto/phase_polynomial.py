@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Mapping, Sequence
+
+import numpy as np
+from pytket import Qubit
+from pytket.circuit import PhasePolyBox
+from sympy import Expr
+
+# Sparse view of PhasePolyBox data. A parity (and a row of the linear
+#  transformation) is packed into an int, with bit i set iff qubit i is in the
+#  parity. pytket only accepts and returns dense bool tuples, so these are
+#  converted one parity at a time at the boundary and never stored.
+
+# A parity is given either as a bitset or as a list of distinct qubit indices.
+Parity = int | Sequence[int]
+
+
+def indices_to_mask(indices: Iterable[int]) -> int:
+    """Pack a list of distinct qubit indices into a bitset."""
+    # A dense bool parity would otherwise be read as the indices 0 and 1.
+    mask = 0
+    for index in indices:
+        if isinstance(index, (bool, np.bool_)):
+            msg = "Expected qubit indices, use parity_to_mask for a dense bool parity."
+            raise TypeError(msg)
+        if index < 0:
+            msg = f"Qubit indices can not be negative, got {index}."
+            raise ValueError(msg)
+        bit = 1 << index
+        if mask & bit:
+            msg = f"Qubit index {index} is repeated."
+            raise ValueError(msg)
+        mask |= bit
+    return mask
+
+
+def mask_to_indices(mask: int) -> list[int]:
+    """Unpack a bitset into the sorted list of qubit indices it contains."""
+    if mask < 0:
+        msg = f"Parity bitsets can not be negative, got {mask}."
+        raise ValueError(msg)
+    indices: list[int] = []
+    while mask:
+        bit = mask & -mask
+        indices.append(bit.bit_length() - 1)
+        mask ^= bit
+    return indices
+
+
+def parity_to_mask(parity: Sequence[bool]) -> int:
+    """Pack a dense parity (as returned by PhasePolyBox.phase_polynomial) into a bitset."""
+    mask = 0
+    for index, boolean in enumerate(parity):
+        if boolean:
+            mask |= 1 << index
+    return mask
+
+
+def mask_to_parity(mask: int, n_qubits: int) -> tuple[bool, ...]:
+    """Expand a bitset into a dense parity of length n_qubits."""
+    return tuple(bool((mask >> index) & 1) for index in range(n_qubits))
+
+
+def _to_mask(parity: Parity) -> int:
+    if isinstance(parity, int) and not isinstance(parity, bool):
+        if parity < 0:
+            msg = f"Parity bitsets can not be negative, got {parity}."
+            raise ValueError(msg)
+        return parity
+    return indices_to_mask(parity)
+
+
+def _is_invertible(rows: list[int]) -> bool:
+    # Gaussian elimination over GF(2), keeping one row per leading bit.
+    pivots: dict[int, int] = {}
+    for row in rows:
+        while row and row.bit_length() in pivots:
+            row ^= pivots[row.bit_length()]
+        if not row:
+            return False
+        pivots[row.bit_length()] = row
+    return True
+
+
+def get_sparse_phase_polynomial(pbox: PhasePolyBox) -> dict[int, Expr | float]:
+    """Return the phase polynomial of a PhasePolyBox keyed by packed parities."""
+    return {
+        parity_to_mask(parity): phase for parity, phase in pbox.phase_polynomial.items()
+    }
+
+
+def get_linear_transformation_rows(pbox: PhasePolyBox) -> list[int]:
+    """Return the rows of the linear transformation of a PhasePolyBox as packed bitsets."""
+    return [parity_to_mask(row) for row in pbox.linear_transformation]
+
+
+def phase_poly_box_from_parities(
+    n_qubits: int,
+    phase_polynomial: Mapping[Parity, Expr | float],
+    linear_rows: Sequence[Parity] | None = None,
+) -> PhasePolyBox:
+    """Construct a PhasePolyBox from sparse parities (bitsets or qubit index lists)."""
+    # The linear transformation defaults to the identity.
+    if linear_rows is None:
+        linear_rows = [1 << index for index in range(n_qubits)]
+    if len(linear_rows) != n_qubits:
+        msg = f"Expected {n_qubits} linear transformation rows, got {len(linear_rows)}."
+        raise ValueError(msg)
+
+    row_masks = [_to_mask(row) for row in linear_rows]
+    for row, mask in zip(linear_rows, row_masks, strict=True):
+        if mask >> n_qubits:
+            msg = f"Row {row} acts on qubits outside of the {n_qubits} qubit box."
+            raise ValueError(msg)
+    if not _is_invertible(row_masks):
+        msg = "The linear transformation rows must be invertible over GF(2)."
+        raise ValueError(msg)
+
+    linear_map = np.zeros((n_qubits, n_qubits), dtype=bool)
+    for row_index, mask in enumerate(row_masks):
+        linear_map[row_index, mask_to_indices(mask)] = True
+
+    # Phases of repeated parities are added together.
+    phases: dict[int, Expr | float] = {}
+    for parity, phase in phase_polynomial.items():
+        mask = _to_mask(parity)
+        if mask >> n_qubits:
+            msg = f"Parity {parity} acts on qubits outside of the {n_qubits} qubit box."
+            raise ValueError(msg)
+        phases[mask] = phases[mask] + phase if mask in phases else phase
+
+    return PhasePolyBox(
+        n_qubits,
+        {Qubit(index): index for index in range(n_qubits)},
+        [(mask_to_parity(mask, n_qubits), phase) for mask, phase in phases.items()],
+        linear_map,
+    )
+
+
+def _is_t_like(phase: Expr | float) -> bool:
+    quarter_turns = phase * 4
+    if abs(quarter_turns - round(quarter_turns)) > 1e-10:
+        return False
+    return round(quarter_turns) % 2 == 1
+
+
+def get_t_count(pbox: PhasePolyBox) -> int:
+    """Return the number of parities with an odd multiple of 1/4 as their phase."""
+    return sum(
+        1
+        for phase in pbox.phase_polynomial.values()
+        if isinstance(phase, float) and _is_t_like(phase)
+    )
@@ -0,0 +1,373 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any
+
+from pytket._tket.circuit import Circuit
+from pytket.circuit import PhasePolyBox
+from pytket.pauli import QubitPauliString, QubitPauliTensor
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.gadgetisation import gadgetise_hadamards, replace_conditionals
+
+# Optional local compile service, so that several processes asking for the
+#  same work share one computation. It is not imported by the package, run it
+#  with python -m topt_proto.service. Requests and responses are lines of JSON
+#  over a Unix socket or a localhost TCP connection:
+#
+#   {"id": 0, "method": "synthesise_clifford", "params": {"pbox": ..., "pauli": ...}}
+#   {"id": 1, "method": "gadgetise_hadamards", "params": {"circuit": ..., "replace_conditionals": true}}
+#   {"id": 0, "result": <circuit>} or {"id": 0, "error": "..."}
+#
+# A line which is not a valid request gets an error response, with id null if
+#  no id could be read. Circuits are sent with Circuit.to_dict and a
+#  PhasePolyBox as a Circuit containing only that box. Identical requests
+#  which are in flight at the same time are keyed on a hash of their JSON
+#  parameters and computed once, nothing is decoded on the event loop. The
+#  random id pytket gives every box is left out of the hash, so equal boxes
+#  built by different clients share the computation. Jobs
+#  go through a bounded queue, so when it is full the server stops reading
+#  new requests and clients are slowed down by the socket instead of using up
+#  memory.
+
+METHODS = ("synthesise_clifford", "gadgetise_hadamards")
+
+
+def pbox_to_dict(pbox: PhasePolyBox) -> dict[str, Any]:
+    return Circuit(pbox.n_qubits).add_gate(pbox, list(range(pbox.n_qubits))).to_dict()
+
+
+def pbox_from_dict(pbox_dict: dict[str, Any]) -> PhasePolyBox:
+    return Circuit.from_dict(pbox_dict).get_commands()[0].op
+
+
+def pauli_to_dict(pauli: QubitPauliTensor) -> dict[str, Any]:
+    return {
+        "string": pauli.string.to_list(),
+        "coeff": [pauli.coeff.real, pauli.coeff.imag],
+    }
+
+
+def pauli_from_dict(pauli_dict: dict[str, Any]) -> QubitPauliTensor:
+    real, imag = pauli_dict["coeff"]
+    return QubitPauliTensor(
+        string=QubitPauliString.from_list(pauli_dict["string"]),
+        coeff=complex(real, imag),
+    )
+
+
+# Jobs run in the executor, so they only take and return plain dicts.
+def _synthesise_clifford_job(
+    pbox_dict: dict[str, Any],
+    pauli_dict: dict[str, Any],
+) -> dict[str, Any]:
+    clifford_circ = synthesise_clifford(
+        pbox_from_dict(pbox_dict),
+        pauli_from_dict(pauli_dict),
+    )
+    return clifford_circ.to_dict()
+
+
+def _gadgetise_hadamards_job(
+    circ_dict: dict[str, Any],
+    deferred: bool,
+) -> dict[str, Any]:
+    circ_prime = gadgetise_hadamards(Circuit.from_dict(circ_dict))
+    if deferred:
+        circ_prime = replace_conditionals(circ_prime)
+    return circ_prime.to_dict()
+
+
+def _without_box_ids(value: Any, in_box: bool = False) -> Any:
+    if isinstance(value, dict):
+        return {
+            key: _without_box_ids(item, in_box=key == "box")
+            for key, item in value.items()
+            if not (in_box and key == "id")
+        }
+    if isinstance(value, (list, tuple)):
+        return [_without_box_ids(item) for item in value]
+    return value
+
+
+def _get_job(method: str, params: dict[str, Any]) -> tuple[str, Any, tuple[Any, ...]]:
+    """Return the content hash, function and arguments of a request."""
+    match method:
+        case "synthesise_clifford":
+            function = _synthesise_clifford_job
+            args = (params["pbox"], params["pauli"])
+        case "gadgetise_hadamards":
+            function = _gadgetise_hadamards_job
+            args = (params["circuit"], bool(params.get("replace_conditionals", False)))
+        case _:
+            msg = f"Unknown method {method}, expected one of {METHODS}."
+            raise ValueError(msg)
+    args_json = json.dumps(_without_box_ids(args), sort_keys=True)
+    key = f"{method}:{hashlib.sha256(args_json.encode()).hexdigest()}"
+    return key, function, args
+
+
+class CompileServer:
+    """asyncio server running synthesise_clifford and gadgetise_hadamards in a process pool."""
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        max_queue_size: int = 64,
+        n_workers: int | None = None,
+    ) -> None:
+        # An executor passed in is owned by the caller and is not shut down.
+        self._n_workers = n_workers or os.cpu_count() or 1
+        self._owns_executor = executor is None
+        self._executor: Executor = executor or ProcessPoolExecutor(self._n_workers)
+        self._max_queue_size = max_queue_size
+        self._queue: asyncio.Queue | None = None
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._workers: list[asyncio.Task] = []
+        self._clients: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+        self.n_requests: int = 0
+        self.n_computations: int = 0
+        self.n_coalesced: int = 0
+
+    @property
+    def queue_size(self) -> int:
+        return 0 if self._queue is None else self._queue.qsize()
+
+    def _start_workers(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self._n_workers)
+        ]
+
+    async def start_unix(self, path: str) -> None:
+        """Listen for clients on a Unix socket."""
+        self._start_workers()
+        self._server = await asyncio.start_unix_server(self._handle_client, path=path)
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Listen for clients on a TCP port (by default a free one), returning the port."""
+        self._start_workers()
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop the server, failing the requests which are still in flight."""
+        if self._server is not None:
+            self._server.close()
+
+        # A cancelled worker drops its future without resolving it, and
+        #  queued jobs are never run, so their futures are failed here.
+        in_flight = list(self._in_flight.values())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        in_flight += self._in_flight.values()
+        self._in_flight = {}
+        for future in in_flight:
+            if not future.done():
+                future.set_exception(ConnectionError("Compile server closed."))
+
+        # Clients get their error responses before their connection closes.
+        for client in self._clients:
+            client.cancel()
+        await asyncio.gather(*self._clients, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+
+        # Running jobs are not waited for, so this does not block the loop.
+        if self._owns_executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def serve_forever(self) -> None:
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            key, function, args = await self._queue.get()
+            future = self._in_flight[key]
+            self.n_computations += 1
+            try:
+                result = await loop.run_in_executor(self._executor, function, *args)
+            except Exception as error:  # noqa: BLE001
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+            finally:
+                del self._in_flight[key]
+                self._queue.task_done()
+
+    def _submit(
+        self,
+        method: str,
+        params: dict[str, Any],
+    ) -> tuple[asyncio.Future, tuple[str, Any, tuple[Any, ...]] | None]:
+        """Return the future of a request and its job, or None if it is already in flight."""
+        key, function, args = _get_job(method, params)
+        if key in self._in_flight:
+            self.n_coalesced += 1
+            return self._in_flight[key], None
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future, (key, function, args)
+
+    async def _handle_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        assert self._queue is not None
+        client = asyncio.current_task()
+        assert client is not None
+        self._clients.add(client)
+        responses: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                self.n_requests += 1
+                request_id = None
+                job = None
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        msg = "Request must be a JSON object."
+                        raise TypeError(msg)
+                    request_id = request.get("id")
+                    future, job = self._submit(request["method"], request["params"])
+                except Exception as error:  # noqa: BLE001
+                    future = asyncio.get_running_loop().create_future()
+                    future.set_exception(error)
+                task = asyncio.create_task(_respond(writer, request_id, future))
+                responses.add(task)
+                task.add_done_callback(responses.discard)
+                if job is not None:
+                    # Waits while the queue is full, which stops this client
+                    #  being read.
+                    await self._queue.put(job)
+        finally:
+            await asyncio.gather(*responses, return_exceptions=True)
+            self._clients.discard(client)
+            writer.close()
+
+
+async def _respond(
+    writer: asyncio.StreamWriter,
+    request_id: int | None,
+    future: asyncio.Future,
+) -> None:
+    # Coalesced requests share the future, so it is only awaited through a
+    #  shield and never cancelled on behalf of another client.
+    try:
+        response = {"id": request_id, "result": await asyncio.shield(future)}
+    except Exception as error:  # noqa: BLE001
+        response = {"id": request_id, "error": f"{type(error).__name__}: {error}"}
+    writer.write(json.dumps(response).encode() + b"\n")
+    await writer.drain()
+
+
+class CompileClient:
+    """Thin client for a CompileServer, requests can be made concurrently."""
+
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._pending: dict[int, asyncio.Future] = {}
+        self._read_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> CompileClient:
+        return cls(*await asyncio.open_unix_connection(path))
+
+    @classmethod
+    async def connect_tcp(cls, host: str = "127.0.0.1", port: int = 0) -> CompileClient:
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def close(self) -> None:
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._read_task.cancel()
+        await asyncio.gather(self._read_task, return_exceptions=True)
+
+    async def _read_responses(self) -> None:
+        while line := await self._reader.readline():
+            response = json.loads(line)
+            # Errors for requests this client did not make have no id.
+            future = self._pending.pop(response["id"], None)
+            if future is None:
+                continue
+            if "error" in response:
+                future.set_exception(RuntimeError(response["error"]))
+            else:
+                future.set_result(response["result"])
+        for future in self._pending.values():
+            future.set_exception(
+                ConnectionError("Compile server closed the connection.")
+            )
+
+    async def _request(self, method: str, params: dict[str, Any]) -> Circuit:
+        request_id = self._next_id
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        request = {"id": request_id, "method": method, "params": params}
+        self._writer.write(json.dumps(request).encode() + b"\n")
+        await self._writer.drain()
+        return Circuit.from_dict(await future)
+
+    async def synthesise_clifford(
+        self,
+        pbox: PhasePolyBox,
+        input_pauli: QubitPauliTensor,
+    ) -> Circuit:
+        params = {"pbox": pbox_to_dict(pbox), "pauli": pauli_to_dict(input_pauli)}
+        return await self._request("synthesise_clifford", params)
+
+    async def gadgetise_hadamards(
+        self,
+        circ: Circuit,
+        replace_conditionals: bool = False,
+    ) -> Circuit:
+        params = {
+            "circuit": circ.to_dict(),
+            "replace_conditionals": replace_conditionals,
+        }
+        return await self._request("gadgetise_hadamards", params)
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = CompileServer(max_queue_size=args.max_queue_size, n_workers=args.workers)
+    if args.socket is not None:
+        await server.start_unix(args.socket)
+    else:
+        port = await server.start_tcp(port=args.port)
+        print(f"Listening on 127.0.0.1:{port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local topt-proto compile service.")
+    parser.add_argument(
+        "--socket", help="Unix socket path, otherwise listen on localhost."
+    )
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-queue-size", type=int, default=64)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
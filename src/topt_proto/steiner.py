@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Mapping, Sequence
+
+from pytket._tket.circuit import Circuit
+from pytket.architecture import Architecture
+from pytket.unit_id import Node, Qubit
+from sympy import Expr
+from topt_proto.phase_polynomial import mask_to_indices
+
+# Connectivity-aware synthesis of the CNOT parts of synthesise_clifford.
+#  Qubit i of a PhasePolyBox is placed on node placement[i] of the
+#  Architecture and every CX is between neighbouring placed nodes. The
+#  output is labelled with the nodes (see place_circuit), so it needs no
+#  routing. Rows and parities are packed bitsets as in
+#  phase_polynomial.py.
+#
+# The linear map uses Steiner-Gauss elimination, see Kissinger and Meijer-van
+#  de Griend, "CNOT circuit extraction for topologically-constrained quantum
+#  memories" (arXiv:1904.00633). Phase gadgets are built on a Steiner tree of
+#  the qubits in their parity.
+
+
+Placement = Mapping[int, Node] | Sequence[Node]
+
+
+def get_placement(
+    architecture: Architecture,
+    n_qubits: int,
+    placement: Placement | None = None,
+) -> list[Node]:
+    """Return the node of each qubit index, checking that the placed nodes are connected."""
+    # By default the qubits go on the first n_qubits nodes in breadth first
+    #  order from the lowest node, which are connected if the Architecture is.
+    nodes = sorted(architecture.nodes)
+    node_indices = {node: index for index, node in enumerate(nodes)}
+    node_adjacency: list[set[int]] = [set() for _ in nodes]
+    for node_a, node_b in architecture.coupling:
+        a, b = node_indices[node_a], node_indices[node_b]
+        node_adjacency[a].add(b)
+        node_adjacency[b].add(a)
+
+    if placement is None:
+        if n_qubits > len(nodes):
+            msg = f"Architecture has {len(nodes)} nodes, expected at least {n_qubits}."
+            raise ValueError(msg)
+        all_indices = set(range(len(nodes)))
+        order = _bfs_order(node_adjacency, 0, all_indices) if nodes else []
+        placed_nodes = [nodes[index] for index in order[:n_qubits]]
+    elif isinstance(placement, Mapping):
+        if set(placement) != set(range(n_qubits)):
+            msg = f"Placement must give a node for each of the qubits 0 to {n_qubits - 1}."
+            raise ValueError(msg)
+        placed_nodes = [placement[index] for index in range(n_qubits)]
+    else:
+        placed_nodes = list(placement)
+
+    if len(placed_nodes) != n_qubits:
+        msg = f"Placement has {len(placed_nodes)} nodes, expected {n_qubits}."
+        raise ValueError(msg)
+    if len(set(placed_nodes)) != n_qubits:
+        msg = "Placement must not put two qubits on the same node."
+        raise ValueError(msg)
+    missing = [node for node in placed_nodes if node not in node_indices]
+    if missing:
+        msg = f"Nodes {missing} are not in the Architecture."
+        raise ValueError(msg)
+
+    placed_indices = {node_indices[node] for node in placed_nodes}
+    if n_qubits:
+        root = node_indices[placed_nodes[0]]
+        if len(_bfs_order(node_adjacency, root, placed_indices)) != n_qubits:
+            msg = "The placed nodes must be connected in the Architecture."
+            raise ValueError(msg)
+    return placed_nodes
+
+
+def get_adjacency(
+    architecture: Architecture,
+    n_qubits: int,
+    placement: Placement | None = None,
+) -> list[set[int]]:
+    """Return the neighbours of each qubit index when placed on the Architecture, see get_placement."""
+    placed_nodes = get_placement(architecture, n_qubits, placement)
+    qubit_indices = {node: index for index, node in enumerate(placed_nodes)}
+    adjacency: list[set[int]] = [set() for _ in range(n_qubits)]
+    for node_a, node_b in architecture.coupling:
+        if node_a in qubit_indices and node_b in qubit_indices:
+            a, b = qubit_indices[node_a], qubit_indices[node_b]
+            adjacency[a].add(b)
+            adjacency[b].add(a)
+    return adjacency
+
+
+def place_circuit(
+    circ: Circuit,
+    architecture: Architecture,
+    placement: Placement | None = None,
+) -> Circuit:
+    """Return a copy of a Circuit with each Qubit(i) renamed to its placed node."""
+    placed_nodes = get_placement(architecture, circ.n_qubits, placement)
+    placed_circ = circ.copy()
+    placed_circ.rename_units(
+        {Qubit(index): node for index, node in enumerate(placed_nodes)},
+    )
+    return placed_circ
+
+
+def _bfs_order(adjacency: list[set[int]], root: int, allowed: set[int]) -> list[int]:
+    order = [root]
+    seen = {root}
+    queue = deque([root])
+    while queue:
+        vertex = queue.popleft()
+        for neighbour in sorted(adjacency[vertex]):
+            if neighbour in allowed and neighbour not in seen:
+                seen.add(neighbour)
+                order.append(neighbour)
+                queue.append(neighbour)
+    return order
+
+
+def _steiner_tree(
+    adjacency: list[set[int]],
+    root: int,
+    terminals: set[int],
+    allowed: set[int],
+) -> list[tuple[int, int]]:
+    """Approximate Steiner tree as (parent, child) edges with parents before children."""
+    # Grow the tree from the root, adding the shortest path to the nearest
+    #  terminal not yet in the tree each time.
+    tree = {root}
+    edges: list[tuple[int, int]] = []
+    remaining = terminals - tree
+    while remaining:
+        parents = {vertex: vertex for vertex in tree}
+        queue = deque(sorted(tree))
+        while queue:
+            vertex = queue.popleft()
+            if vertex in remaining:
+                break
+            for neighbour in sorted(adjacency[vertex]):
+                if neighbour in allowed and neighbour not in parents:
+                    parents[neighbour] = vertex
+                    queue.append(neighbour)
+        else:
+            msg = "Terminals are not connected in the Architecture."
+            raise ValueError(msg)
+
+        path = [vertex]
+        while parents[path[-1]] != path[-1]:
+            path.append(parents[path[-1]])
+        for child, parent in zip(path[-2::-1], path[:0:-1]):
+            tree.add(child)
+            edges.append((parent, child))
+        remaining -= tree
+    return _order_from_root(edges, root)
+
+
+def _order_from_root(edges: list[tuple[int, int]], root: int) -> list[tuple[int, int]]:
+    children: dict[int, list[int]] = {}
+    for parent, child in edges:
+        children.setdefault(parent, []).append(child)
+    ordered: list[tuple[int, int]] = []
+    stack = [root]
+    while stack:
+        parent = stack.pop()
+        for child in children.get(parent, []):
+            ordered.append((parent, child))
+            stack.append(child)
+    return ordered
+
+
+def _accumulate_to_root(
+    edges: list[tuple[int, int]],
+    terminals: set[int],
+) -> list[tuple[int, int]]:
+    """CX gates along a Steiner tree adding the parity of the terminals onto its root."""
+    # Going up the tree each vertex collects the parity of the terminals below
+    #  it. A Steiner vertex first removes its own value through one child.
+    gates: list[tuple[int, int]] = []
+    cleared: set[int] = set(terminals)
+    for parent, child in reversed(edges):
+        if parent not in cleared:
+            gates.append((parent, child))
+            cleared.add(parent)
+        gates.append((child, parent))
+    return gates
+
+
+def _solve_row_combination(rows: dict[int, int], target: int) -> set[int]:
+    # Find the set of rows (as a dict index -> bitset) summing to target.
+    #  Each basis row keeps track of which of the original rows it is made of.
+    basis: list[tuple[int, int]] = []
+    for index, row in rows.items():
+        combination = 1 << index
+        for basis_row, basis_combination in basis:
+            if row ^ basis_row < row:
+                row ^= basis_row
+                combination ^= basis_combination
+        if row:
+            basis.append((row, combination))
+            basis.sort(reverse=True)
+
+    combination = 0
+    for basis_row, basis_combination in basis:
+        if target ^ basis_row < target:
+            target ^= basis_row
+            combination ^= basis_combination
+    assert target == 0
+    return set(mask_to_indices(combination))
+
+
+def steiner_gauss(linear_rows: Sequence[int], adjacency: list[set[int]]) -> Circuit:
+    """Synthesise a CNOT Circuit for the linear map with the given rows, respecting the adjacency."""
+    n_qubits = len(linear_rows)
+    rows = list(linear_rows)
+    # Row operations reducing the map to the identity, as (control, target).
+    operations: list[tuple[int, int]] = []
+
+    def add_row(control: int, target: int) -> None:
+        rows[target] ^= rows[control]
+        operations.append((control, target))
+
+    # Removing qubits in reverse BFS order leaves the rest connected.
+    remaining = set(range(n_qubits))
+    for pivot in reversed(_bfs_order(adjacency, 0, remaining) if n_qubits else []):
+        pivot_bit = 1 << pivot
+
+        # Clear the pivot column, filling in the Steiner vertices first.
+        terminals = {pivot} | {q for q in remaining if rows[q] & pivot_bit}
+        edges = _steiner_tree(adjacency, pivot, terminals, remaining)
+        for parent, child in reversed(edges):
+            if rows[child] & pivot_bit and not rows[parent] & pivot_bit:
+                add_row(child, parent)
+        for parent, child in reversed(edges):
+            add_row(parent, child)
+
+        # Clear the pivot row by adding the other remaining rows onto it.
+        remaining.remove(pivot)
+        remaining_mask = sum(1 << q for q in remaining)
+        terminals = _solve_row_combination(
+            {q: rows[q] & remaining_mask for q in remaining},
+            rows[pivot] & remaining_mask,
+        )
+        edges = _steiner_tree(
+            adjacency, pivot, terminals | {pivot}, remaining | {pivot}
+        )
+        for control, target in _accumulate_to_root(edges, terminals | {pivot}):
+            add_row(control, target)
+        assert rows[pivot] == pivot_bit
+
+    # The row operations take the map to the identity, so the map is their
+    #  product in reverse order.
+    cnot_circ = Circuit(n_qubits)
+    for control, target in reversed(operations):
+        cnot_circ.CX(control, target)
+    return cnot_circ
+
+
+def get_steiner_phase_gadget_circuit(
+    parities: Sequence[int],
+    phases: Sequence[Expr | float],
+    adjacency: list[set[int]],
+) -> Circuit:
+    """Phase gadgets exp(-iπθ/2 Z...Z) for each parity and phase, with CX gates on a Steiner tree."""
+    n_qubits = len(adjacency)
+    gadget_circ = Circuit(n_qubits)
+    all_qubits = set(range(n_qubits))
+    for parity, phase in zip(parities, phases):
+        terminals = set(mask_to_indices(parity))
+        root = min(terminals)
+        edges = _steiner_tree(adjacency, root, terminals, all_qubits)
+        gates = _accumulate_to_root(edges, terminals)
+        for control, target in gates:
+            gadget_circ.CX(control, target)
+        gadget_circ.Rz(phase, root)
+        for control, target in reversed(gates):
+            gadget_circ.CX(control, target)
+    return gadget_circ
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+from pytket._tket.circuit import Circuit
+from pytket.architecture import Architecture
+from pytket.circuit import PhasePolyBox
+from pytket.pauli import QubitPauliTensor
+from sympy import Expr, Symbol, lambdify
+from topt_proto.clifford import (
+    _get_clifford_circuit,
+    _get_q_sequence,
+    get_pauli_conjugate,
+)
+from topt_proto.steiner import Placement, place_circuit
+
+# synthesise_clifford only depends on the phases of the PhasePolyBox through
+#  the angles of the Q sequence gadgets. Everything else (the linear map L,
+#  P' = L P L†, the parities and which of them anticommute with P') can be
+#  computed once for a symbolic PhasePolyBox and reused for every binding.
+#  The structure comes from the same helpers as synthesise_clifford, which
+#  also accepts a symbolic PhasePolyBox directly.
+
+
+class CliffordTemplate:
+    """Angle independent result of synthesise_clifford for a (possibly symbolic) PhasePolyBox."""
+
+    def __init__(
+        self,
+        pbox: PhasePolyBox,
+        input_pauli: QubitPauliTensor,
+        architecture: Architecture | None = None,
+        placement: Placement | None = None,
+    ) -> None:
+        self.n_qubits: int = pbox.n_qubits
+        self.new_pauli: QubitPauliTensor = get_pauli_conjugate(pbox, input_pauli)
+
+        # Parities are kept as packed bitsets, see phase_polynomial.py.
+        self.parities: list[int]
+        self.anticommuting_mask: list[bool]
+        self.parities, self.anticommuting_mask, q_sequence, q_phases = _get_q_sequence(
+            pbox,
+            self.new_pauli,
+        )
+
+        free_symbols: set[Symbol] = set()
+        for phase in q_phases:
+            if isinstance(phase, Expr):
+                free_symbols.update(phase.free_symbols)
+        self.symbols: list[Symbol] = sorted(free_symbols, key=str)
+        self._angle_function = lambdify(self.symbols, q_phases, modules="numpy")
+
+        # Each Q sequence gadget gets a placeholder symbol, so binding only
+        #  needs a substitution of floats into an already decomposed Circuit.
+        self._placeholders = [Symbol(f"_q{i}") for i in range(len(q_phases))]
+        self.circuit: Circuit = _get_clifford_circuit(
+            self.new_pauli,
+            q_sequence,
+            self._placeholders,
+            self.n_qubits,
+            architecture,
+            placement,
+        )
+        if architecture is not None:
+            self.circuit = place_circuit(self.circuit, architecture, placement)
+
+    @property
+    def n_gadgets(self) -> int:
+        return len(self._placeholders)
+
+    def get_angles(
+        self,
+        bindings: Mapping[Symbol, float | Sequence[float]],
+    ) -> np.ndarray:
+        """Evaluate the Q sequence angles for one or many bindings, one row per binding."""
+        missing = [sym for sym in self.symbols if sym not in bindings]
+        if missing:
+            msg = f"No value given for symbols {missing}."
+            raise ValueError(msg)
+
+        values = [np.asarray(bindings[sym], dtype=float) for sym in self.symbols]
+        n_bindings = max((value.size for value in values if value.ndim > 0), default=1)
+        angle_columns = [
+            np.broadcast_to(np.asarray(angle, dtype=float), (n_bindings,))
+            for angle in self._angle_function(*values)
+        ]
+        if not angle_columns:
+            return np.zeros((n_bindings, 0))
+        return np.stack(angle_columns, axis=1)
+
+    def bind_angles(self, angles: Sequence[float]) -> Circuit:
+        """Return the Clifford Circuit for one row of angles produced by get_angles."""
+        if len(angles) != self.n_gadgets:
+            msg = f"Expected {self.n_gadgets} angles, got {len(angles)}."
+            raise ValueError(msg)
+        circ = self.circuit.copy()
+        angle_map = {
+            placeholder: float(angle)
+            for placeholder, angle in zip(self._placeholders, angles)
+        }
+        circ.symbol_substitution(angle_map)
+        return circ
+
+    def bind(self, symbol_map: Mapping[Symbol, float]) -> Circuit:
+        """Return the Clifford Circuit for a single binding of the PhasePolyBox symbols."""
+        return self.bind_angles(self.get_angles(symbol_map)[0])
+
+    def bind_all(self, bindings: Mapping[Symbol, Sequence[float]]) -> list[Circuit]:
+        """Return the Clifford Circuits for many bindings, evaluating all angles in one step."""
+        return [self.bind_angles(row) for row in self.get_angles(bindings)]
+
+
+def bind_circuit(circ: Circuit, symbol_map: Mapping[Symbol, float]) -> Circuit:
+    """Return a copy of a symbolic Circuit (e.g. after REPLACE_HADAMARDS) with its symbols bound."""
+    circ_prime = circ.copy()
+    circ_prime.symbol_substitution(dict(symbol_map))
+    return circ_prime
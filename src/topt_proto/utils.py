@@ -5,9 +5,11 @@ from pytket.predicates import NoSymbolsPredicate
 from pytket.passes import CustomPass
 
 
-def check_rz_angles(circ: Circuit) -> bool:
+def check_rz_angles(circ: Circuit, allow_symbols: bool = False) -> bool:
     """Check that all Rz gates in a Circuit can be implemented with Clifford+T gates."""
-    if not NoSymbolsPredicate().verify(circ):
+    # Symbolic angles can only be checked once they are bound, so with
+    #  allow_symbols=True only the numerical Rz angles are checked.
+    if not allow_symbols and not NoSymbolsPredicate().verify(circ):
         symbol_msg = "Circuit contains symbolic angles."
         raise ValueError(symbol_msg)
 
@@ -20,6 +22,8 @@ def check_rz_angles(circ: Circuit) -> bool:
     allowed_non_clifford_angles = [0.25, 0.75, 1.25, 1.75]
 
     for op in rz_op_list:
+        if op.free_symbols():
+            continue
         if not op.is_clifford():
             if abs(op.params[0]) % 2 in allowed_non_clifford_angles:
                 pass
@@ -29,10 +33,25 @@ def check_rz_angles(circ: Circuit) -> bool:
     return True
 
 
-def check_phasepolybox(ppb: PhasePolyBox) -> bool:
+def check_phasepolybox(ppb: PhasePolyBox, allow_symbols: bool = False) -> bool:
     """Check that the underlying Circuit for a PhasePolyBox is Clifford + T."""
-    circ = ppb.get_circuit()
-    return check_rz_angles(circ)
+    # The Rz angles of the underlying Circuit are exactly the phases of the
+    #  phase polynomial, so check those rather than synthesising the Circuit.
+    phases = list(ppb.phase_polynomial.values())
+
+    if not allow_symbols and not all(isinstance(phase, float) for phase in phases):
+        symbol_msg = "PhasePolyBox contains symbolic angles."
+        raise ValueError(symbol_msg)
+
+    if len(phases) == 0:
+        no_rz_error = "PhasePolyBox does not contain any Rz gates."
+        raise ValueError(no_rz_error)
+
+    for phase in phases:
+        if isinstance(phase, float) and abs(phase * 4 - round(phase * 4)) > 1e-10:
+            return False
+
+    return True
 
 
 def _is_conditional_pauli_x(operation: Conditional) -> bool:
@@ -78,12 +97,21 @@ def reverse_circuit(circ: Circuit) -> Circuit:
     return new_circ
 
 
+# Rz angles of the diagonal Clifford+T gates, up to global phase.
+RZ_ANGLES = {
+    OpType.T: 0.25,
+    OpType.Tdg: -0.25,
+    OpType.S: 0.5,
+    OpType.Sdg: -0.5,
+}
+
+
 def convert_t_to_rz(circ: Circuit) -> Circuit:
-    circ_prime = Circuit(circ.n_qubits)
+    circ_prime = initialise_registers(circ)
 
     for cmd in circ:
-        if cmd.op.type == OpType.T:
-            circ_prime.Rz(0.25, cmd.qubits[0])
+        if cmd.op.type in RZ_ANGLES:
+            circ_prime.Rz(RZ_ANGLES[cmd.op.type], cmd.qubits[0])
         else:
             circ_prime.add_gate(cmd.op.type, cmd.op.params, cmd.qubits)
 
@@ -0,0 +1,553 @@
+from __future__ import annotations
+
+import heapq
+
+import numpy as np
+from pytket import Qubit
+from pytket._tket.circuit import Circuit, Command, OpType
+from pytket.circuit import PhasePolyBox
+from pytket.passes import DecomposeBoxes
+from pytket.pauli import Pauli, QubitPauliTensor
+from pytket.unit_id import UnitID
+
+# Polynomial time checks for the output of synthesise_clifford. Rather than
+#  comparing dense unitaries we compare how the two operators act on the
+#  Pauli generators X_i and Z_i (i.e. their Clifford tableaux). Paulis are
+#  stored as integer bitsets so that these checks scale to wide circuits.
+
+
+class _PauliString:
+    """A Hermitian Pauli operator, (-1)^sign times a tensor of X/Y/Z/I given by the x and z bitsets."""
+
+    __slots__ = ("sign", "x", "z")
+
+    def __init__(self, x: int = 0, z: int = 0, sign: int = 0) -> None:
+        self.x = x
+        self.z = z
+        self.sign = sign
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _PauliString):
+            return NotImplemented
+        return (self.x, self.z, self.sign) == (other.x, other.z, other.sign)
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.z, self.sign))
+
+    def __repr__(self) -> str:
+        return f"_PauliString(x={self.x:#b}, z={self.z:#b}, sign={self.sign})"
+
+    def copy(self) -> _PauliString:
+        return _PauliString(self.x, self.z, self.sign)
+
+    def anticommutes_with_z(self, z: int) -> bool:
+        return (self.x & z).bit_count() % 2 == 1
+
+    def commutes_with(self, other: _PauliString) -> bool:
+        overlap = (self.x & other.z).bit_count() + (self.z & other.x).bit_count()
+        return overlap % 2 == 0
+
+    def multiply(self, other: _PauliString) -> tuple[_PauliString, int]:
+        """Return (Q, k) such that self * other = i^k Q."""
+        # Phase exponents of the single qubit products, as in Aaronson-Gottesman.
+        exponent = 2 * (self.sign + other.sign)
+        support = self.x | self.z
+        while support:
+            bit = support & -support
+            support ^= bit
+            x1, z1 = bool(self.x & bit), bool(self.z & bit)
+            x2, z2 = bool(other.x & bit), bool(other.z & bit)
+            if x1 and z1:
+                exponent += z2 - x2
+            elif x1:
+                exponent += z2 * (2 * x2 - 1)
+            else:
+                exponent += x2 * (1 - 2 * z2)
+        product = _PauliString(self.x ^ other.x, self.z ^ other.z)
+        return product, exponent % 4
+
+    def h(self, q: int) -> None:
+        x_q, z_q = (self.x >> q) & 1, (self.z >> q) & 1
+        self.sign ^= x_q & z_q
+        if x_q != z_q:
+            self.x ^= 1 << q
+            self.z ^= 1 << q
+
+    def s(self, q: int) -> None:
+        x_q, z_q = (self.x >> q) & 1, (self.z >> q) & 1
+        self.sign ^= x_q & z_q
+        self.z ^= x_q << q
+
+    def sdg(self, q: int) -> None:
+        x_q, z_q = (self.x >> q) & 1, (self.z >> q) & 1
+        self.sign ^= x_q & (1 - z_q)
+        self.z ^= x_q << q
+
+    def pauli_x(self, q: int) -> None:
+        self.sign ^= (self.z >> q) & 1
+
+    def pauli_z(self, q: int) -> None:
+        self.sign ^= (self.x >> q) & 1
+
+    def cx(self, control: int, target: int) -> None:
+        x_c, z_c = (self.x >> control) & 1, (self.z >> control) & 1
+        x_t, z_t = (self.x >> target) & 1, (self.z >> target) & 1
+        self.sign ^= x_c & z_t & (x_t ^ z_c ^ 1)
+        self.x ^= x_c << target
+        self.z ^= z_t << control
+
+    def swap(self, q0: int, q1: int) -> None:
+        for bits in ("x", "z"):
+            value = getattr(self, bits)
+            if ((value >> q0) & 1) != ((value >> q1) & 1):
+                setattr(self, bits, value ^ ((1 << q0) | (1 << q1)))
+
+
+def _pauli_from_tensor(
+    tensor: QubitPauliTensor,
+    qubit_indices: dict[Qubit, int],
+) -> _PauliString:
+    pauli = _PauliString()
+    for qubit, pauli_op in tensor.string.map.items():
+        bit = 1 << qubit_indices[qubit]
+        if pauli_op in (Pauli.X, Pauli.Y):
+            pauli.x |= bit
+        if pauli_op in (Pauli.Z, Pauli.Y):
+            pauli.z |= bit
+    return pauli
+
+
+def _get_clifford_rz(angle: float) -> OpType | None:
+    # Rz(angle) up to global phase, or None if the angle is not Clifford.
+    quarter_turns = angle * 2
+    if abs(quarter_turns - round(quarter_turns)) > 1e-10:
+        return None
+    return [OpType.noop, OpType.S, OpType.Z, OpType.Sdg][round(quarter_turns) % 4]
+
+
+def _get_clifford_gates(
+    circ: Circuit,
+    qubit_indices: dict[Qubit, int],
+) -> list[tuple[OpType, list[int]]]:
+    # Resolve the Commands of a Clifford Circuit once, so that many Paulis can
+    #  be pushed through it cheaply. Clifford Rz gates become S, Z or Sdg.
+    gates: list[tuple[OpType, list[int]]] = []
+    for cmd in circ:
+        op_type = cmd.op.type
+        if op_type in (OpType.Rz, OpType.U1):
+            angle = cmd.op.params[0]
+            clifford_type = (
+                _get_clifford_rz(angle) if isinstance(angle, float) else None
+            )
+            if clifford_type is None:
+                msg = f"Rz({angle}) is not a Clifford gate."
+                raise ValueError(msg)
+            op_type = clifford_type
+        gates.append((op_type, [qubit_indices[qubit] for qubit in cmd.qubits]))
+    return gates
+
+
+def _conjugate_by_gate(pauli: _PauliString, op_type: OpType, args: list[int]) -> None:
+    """Replace P with G P G† for the Clifford gate G."""
+    match op_type:
+        case OpType.noop | OpType.Barrier | OpType.Phase:
+            pass
+        case OpType.H:
+            pauli.h(args[0])
+        case OpType.S:
+            pauli.s(args[0])
+        case OpType.Sdg:
+            pauli.sdg(args[0])
+        case OpType.X:
+            pauli.pauli_x(args[0])
+        case OpType.Z:
+            pauli.pauli_z(args[0])
+        case OpType.Y:
+            pauli.pauli_x(args[0])
+            pauli.pauli_z(args[0])
+        case OpType.V | OpType.SX:
+            pauli.h(args[0])
+            pauli.s(args[0])
+            pauli.h(args[0])
+        case OpType.Vdg | OpType.SXdg:
+            pauli.h(args[0])
+            pauli.sdg(args[0])
+            pauli.h(args[0])
+        case OpType.CX:
+            pauli.cx(args[0], args[1])
+        case OpType.CZ:
+            pauli.h(args[1])
+            pauli.cx(args[0], args[1])
+            pauli.h(args[1])
+        case OpType.SWAP:
+            pauli.swap(args[0], args[1])
+        case _:
+            msg = f"Pauli propagation not implemented for {op_type}."
+            raise NotImplementedError(msg)
+
+
+def _get_generators(n_qubits: int) -> list[_PauliString]:
+    generators: list[_PauliString] = []
+    for q in range(n_qubits):
+        generators.append(_PauliString(x=1 << q))
+        generators.append(_PauliString(z=1 << q))
+    return generators
+
+
+def get_clifford_tableau(circ: Circuit) -> list[_PauliString]:
+    """Return the images C X_i C† and C Z_i C† of the generators under a Clifford Circuit C."""
+    qubit_indices = {qubit: i for i, qubit in enumerate(circ.qubits)}
+    images = _get_generators(circ.n_qubits)
+    for op_type, args in _get_clifford_gates(circ, qubit_indices):
+        for pauli in images:
+            _conjugate_by_gate(pauli, op_type, args)
+    return images
+
+
+def _conjugate_by_z_rotation(pauli: _PauliString, z: int, angle: float) -> bool:
+    # Replace P with R P R† where R = exp(-i pi angle/2 Z_z). Returns False
+    #  if R is not Clifford.
+    if not pauli.anticommutes_with_z(z):
+        return True
+    if not isinstance(angle, float):
+        return False
+    clifford_type = _get_clifford_rz(angle)
+    if clifford_type is None:
+        return False
+    # R P R† = R² P = exp(-i pi angle Z_z) P
+    if clifford_type == OpType.Z:
+        pauli.sign ^= 1
+    elif clifford_type in (OpType.S, OpType.Sdg):
+        product, exponent = _PauliString(z=z).multiply(pauli)
+        # exp(∓ i pi/2 Z_z) = ∓ i Z_z
+        exponent += 3 if clifford_type == OpType.S else 1
+        pauli.x, pauli.z = product.x, product.z
+        pauli.sign = (exponent % 4) // 2
+    return True
+
+
+def get_pauli_conjugate_tableau(
+    pbox: PhasePolyBox,
+    input_pauli: QubitPauliTensor,
+) -> list[_PauliString] | None:
+    """Return the tableau of U† P U for a PhasePolyBox U, or None if U† P U is not Clifford."""
+    u_circ = pbox.get_circuit()
+    qubit_indices = {qubit: i for i, qubit in enumerate(u_circ.qubits)}
+
+    # Write U† P U = P' R_1 ... R_k where each R_j = exp(-i pi a_j/2 Z_{s_j}) is a
+    #  Z parity rotation. Conjugating by the gates of U in reverse order, the
+    #  Rz gates which anticommute with P' each add a rotation of twice their
+    #  angle and the CX gates act on P' and the parities s_j.
+    pauli = _pauli_from_tensor(input_pauli, qubit_indices)
+    rotations: list[tuple[int, float]] = []
+    for cmd in reversed(u_circ.get_commands()):
+        args = [qubit_indices[qubit] for qubit in cmd.qubits]
+        if cmd.op.type == OpType.CX:
+            control, target = args
+            pauli.cx(control, target)
+            rotations = [
+                (z ^ (((z >> target) & 1) << control), angle) for z, angle in rotations
+            ]
+        elif cmd.op.type == OpType.Rz:
+            z = 1 << args[0]
+            if pauli.anticommutes_with_z(z):
+                rotations.append((z, 2 * cmd.op.params[0]))
+        else:
+            msg = f"Unexpected {cmd.op.type} in PhasePolyBox circuit."
+            raise ValueError(msg)
+
+    merged_rotations: dict[int, float] = {}
+    for z, angle in rotations:
+        merged_rotations[z] = merged_rotations.get(z, 0.0) + angle
+
+    images = _get_generators(pbox.n_qubits)
+    for image in images:
+        for z, angle in merged_rotations.items():
+            if not _conjugate_by_z_rotation(image, z, angle):
+                return None
+        if not image.commutes_with(pauli):
+            image.sign ^= 1
+    return images
+
+
+def verify_clifford_synthesis(
+    pbox: PhasePolyBox,
+    input_pauli: QubitPauliTensor,
+    clifford_circ: Circuit,
+) -> bool:
+    """Check in polynomial time that a Clifford Circuit implements U† P U (up to global phase)."""
+    if clifford_circ.n_qubits != pbox.n_qubits:
+        return False
+    expected = get_pauli_conjugate_tableau(pbox, input_pauli)
+    if expected is None:
+        return False
+    return get_clifford_tableau(clifford_circ) == expected
+
+
+# Equivalence checks for the output of REPLACE_HADAMARDS followed by
+#  REPLACE_CONDITIONALS. The gadgetised Circuit W acts on the data qubits of
+#  the original Circuit U plus the ancillas, which start in |0>. The rewrite is
+#  correct when W(|ψ> ⊗ |0>) = U|ψ> ⊗ |φ> for every input state |ψ>.
+
+
+def _get_gadgetised_qubits(
+    original: Circuit,
+    gadgetised: Circuit,
+) -> tuple[list[Qubit], list[Qubit]]:
+    if gadgetised.n_gates_of_type(OpType.Measure) > 0:
+        msg = "Gadgetised Circuit must not contain measurements, apply REPLACE_CONDITIONALS first."
+        raise ValueError(msg)
+    data_qubits = list(original.qubits)
+    ancillas = [qubit for qubit in gadgetised.qubits if qubit not in data_qubits]
+    return data_qubits, ancillas
+
+
+def _add_missing_qubits(circ: Circuit, qubits: list[Qubit]) -> Circuit:
+    # REPLACE_CONDITIONALS removes blank wires, add them back as idle qubits.
+    circ_prime = circ.copy()
+    for qubit in qubits:
+        if qubit not in circ_prime.qubits:
+            circ_prime.add_qubit(qubit)
+    return circ_prime
+
+
+def _prepend_state_preparation(
+    circ: Circuit,
+    angles: dict[Qubit, tuple[float, float]],
+) -> Circuit:
+    prepared_circ = Circuit()
+    for qubit in circ.qubits:
+        prepared_circ.add_qubit(qubit)
+    for qubit, (theta, phi) in angles.items():
+        prepared_circ.Ry(theta, qubit).Rz(phi, qubit)
+    for cmd in circ:
+        if cmd.op.type == OpType.Barrier:
+            prepared_circ.add_barrier(cmd.qubits)
+        else:
+            prepared_circ.add_gate(cmd.op, cmd.qubits)
+    return prepared_circ
+
+
+def check_gadgetisation_statevector(
+    original: Circuit,
+    gadgetised: Circuit,
+    n_samples: int = 3,
+    seed: int | None = None,
+) -> bool:
+    """Check W(|ψ> ⊗ |0>) = U|ψ> ⊗ |φ> by statevector simulation for random product states |ψ>."""
+    data_qubits, ancillas = _get_gadgetised_qubits(original, gadgetised)
+    gadgetised = _add_missing_qubits(gadgetised, data_qubits)
+    data_positions = [gadgetised.qubits.index(qubit) for qubit in data_qubits]
+    ancilla_positions = [gadgetised.qubits.index(qubit) for qubit in ancillas]
+
+    rng = np.random.default_rng(seed)
+    for _ in range(n_samples):
+        angles = {qubit: tuple(rng.uniform(0, 2, size=2)) for qubit in data_qubits}
+        expected = _prepend_state_preparation(original, angles).get_statevector()
+        result = _prepend_state_preparation(gadgetised, angles).get_statevector()
+
+        # Reorder so that the data qubits come first, then project the data
+        #  register onto U|ψ>. The remaining ancilla vector has unit norm iff
+        #  the data register was left in U|ψ>, unentangled with the ancillas.
+        result = np.transpose(
+            result.reshape([2] * gadgetised.n_qubits),
+            data_positions + ancilla_positions,
+        ).reshape(2 ** len(data_qubits), 2 ** len(ancillas))
+        ancilla_state = expected.conj() @ result
+        if not np.isclose(np.linalg.norm(ancilla_state), 1.0):
+            return False
+    return True
+
+
+def _is_clifford_box(pbox: PhasePolyBox) -> bool:
+    # Symbolic phases count as non-Clifford, such boxes are compared as they are.
+    return all(
+        isinstance(phase, float) and _get_clifford_rz(phase) is not None
+        for phase in pbox.phase_polynomial.values()
+    )
+
+
+def _boxes_are_equal(pbox_0: PhasePolyBox, pbox_1: PhasePolyBox) -> bool:
+    return (
+        pbox_0.n_qubits == pbox_1.n_qubits
+        and pbox_0.phase_polynomial == pbox_1.phase_polynomial
+        and np.array_equal(pbox_0.linear_transformation, pbox_1.linear_transformation)
+    )
+
+
+def _is_non_clifford_box(cmd: Command) -> bool:
+    return cmd.op.type == OpType.PhasePolyBox and not _is_clifford_box(cmd.op)
+
+
+def _get_box_ordered_commands(
+    circ: Circuit,
+    qubit_indices: dict[Qubit, int],
+) -> list[Command]:
+    # Topologically sort the Commands, taking every ready Clifford Command
+    #  before the next non-Clifford box. Of the ready boxes, which act on
+    #  disjoint qubits, the one on the lowest qubit goes first. This order
+    #  only depends on the boxes and their data qubits, so U and W agree on
+    #  it, where the command order of the Circuits need not.
+    commands = circ.get_commands()
+    successors: list[list[int]] = [[] for _ in commands]
+    n_predecessors = [0] * len(commands)
+    last_command: dict[UnitID, int] = {}
+    for index, cmd in enumerate(commands):
+        predecessors = {last_command[arg] for arg in cmd.args if arg in last_command}
+        for predecessor in predecessors:
+            successors[predecessor].append(index)
+        n_predecessors[index] = len(predecessors)
+        for arg in cmd.args:
+            last_command[arg] = index
+
+    ready_cliffords: list[int] = []
+    ready_boxes: list[tuple[int, int]] = []
+
+    def release(index: int) -> None:
+        cmd = commands[index]
+        if _is_non_clifford_box(cmd):
+            key = min(qubit_indices[qubit] for qubit in cmd.qubits)
+            heapq.heappush(ready_boxes, (key, index))
+        else:
+            heapq.heappush(ready_cliffords, index)
+
+    for index in range(len(commands)):
+        if n_predecessors[index] == 0:
+            release(index)
+
+    ordered_commands: list[Command] = []
+    while ready_cliffords or ready_boxes:
+        if ready_cliffords:
+            index = heapq.heappop(ready_cliffords)
+        else:
+            _, index = heapq.heappop(ready_boxes)
+        ordered_commands.append(commands[index])
+        for successor in successors[index]:
+            n_predecessors[successor] -= 1
+            if n_predecessors[successor] == 0:
+                release(successor)
+    return ordered_commands
+
+
+def _split_at_non_clifford_boxes(
+    circ: Circuit,
+    qubit_indices: dict[Qubit, int],
+) -> tuple[
+    list[list[tuple[OpType, list[int]]]], list[tuple[PhasePolyBox, list[Qubit]]]
+]:
+    # Cut the Circuit into Clifford segments separated by the non-Clifford
+    #  PhasePolyBoxes. Returns the gates of each segment and
+    #  the boxes with their qubits, there is one more segment than boxes.
+    segments: list[list[tuple[OpType, list[int]]]] = []
+    boxes: list[tuple[PhasePolyBox, list[Qubit]]] = []
+
+    def new_segment() -> Circuit:
+        segment_circ = Circuit()
+        for qubit in circ.qubits:
+            segment_circ.add_qubit(qubit)
+        return segment_circ
+
+    def close_segment(segment_circ: Circuit) -> None:
+        DecomposeBoxes().apply(segment_circ)
+        segments.append(_get_clifford_gates(segment_circ, qubit_indices))
+
+    segment_circ = new_segment()
+    for cmd in _get_box_ordered_commands(circ, qubit_indices):
+        if _is_non_clifford_box(cmd):
+            close_segment(segment_circ)
+            boxes.append((cmd.op, cmd.qubits))
+            segment_circ = new_segment()
+        elif cmd.op.type == OpType.Barrier:
+            segment_circ.add_barrier(cmd.qubits)
+        else:
+            segment_circ.add_gate(cmd.op, cmd.qubits)
+    close_segment(segment_circ)
+    return segments, boxes
+
+
+def _reduce_by_stabilisers(
+    pauli: _PauliString,
+    stabilisers: dict[int, _PauliString],
+    n_qubits: int,
+) -> _PauliString | None:
+    # Multiply by the echelon form stabilisers until the leading bit is not a
+    #  pivot. Returns None if a non-Hermitian product shows up, which happens
+    #  only if the Pauli anticommutes with the stabiliser group.
+    while True:
+        vector = (pauli.x << n_qubits) | pauli.z
+        if vector == 0 or vector.bit_length() - 1 not in stabilisers:
+            return pauli
+        product, exponent = stabilisers[vector.bit_length() - 1].multiply(pauli)
+        if exponent % 2 == 1:
+            return None
+        product.sign = exponent // 2
+        pauli = product
+
+
+def _conjugate_by_gates(
+    gates: list[tuple[OpType, list[int]]],
+    pauli: _PauliString,
+) -> _PauliString:
+    for op_type, args in gates:
+        _conjugate_by_gate(pauli, op_type, args)
+    return pauli
+
+
+def check_gadgetisation_tableau(original: Circuit, gadgetised: Circuit) -> bool:
+    """Check W(|ψ> ⊗ |0>) = U|ψ> ⊗ |φ> in polynomial time, segment by segment between the non-Clifford boxes."""
+    # U and W are cut at their non-Clifford PhasePolyBoxes, which must be the
+    #  same boxes on the same data qubits and in the same order. Between two
+    #  boxes the segment D of W is Clifford and must map |ψ> ⊗ |φ> to C|ψ> ⊗ |φ'>
+    #  for the segment C of U, where |φ> is the ancilla state left by the
+    #  previous segment. This is checked with tableaux, tracking |φ> by its
+    #  stabilisers. As the boxes do not touch the ancillas, the segments then
+    #  compose to W(|ψ> ⊗ |0>) = U|ψ> ⊗ |φ>. The check is sound but may reject
+    #  a correct W whose boxes are reordered or merged.
+    data_qubits, ancillas = _get_gadgetised_qubits(original, gadgetised)
+    gadgetised = _add_missing_qubits(gadgetised, data_qubits)
+
+    qubit_indices = {qubit: i for i, qubit in enumerate(data_qubits + ancillas)}
+    n_qubits = len(qubit_indices)
+    data_mask = (1 << len(data_qubits)) - 1
+
+    segments_u, boxes_u = _split_at_non_clifford_boxes(original, qubit_indices)
+    segments_w, boxes_w = _split_at_non_clifford_boxes(gadgetised, qubit_indices)
+    if len(boxes_u) != len(boxes_w):
+        return False
+    for (pbox_u, qubits_u), (pbox_w, qubits_w) in zip(boxes_u, boxes_w, strict=True):
+        if qubits_u != qubits_w or not _boxes_are_equal(pbox_u, pbox_w):
+            return False
+
+    # The ancillas start in |0>, stabilised by Z_a for each ancilla a.
+    ancilla_stabilisers = [_PauliString(z=1 << qubit_indices[a]) for a in ancillas]
+    for gates_u, gates_w in zip(segments_u, segments_w, strict=True):
+        # The image of the segment is stabilised by D S D† for each stabiliser
+        #  S. These must act trivially on the data qubits for the output to be
+        #  a product state.
+        stabilisers: dict[int, _PauliString] = {}
+        ancilla_stabilisers = [
+            _conjugate_by_gates(gates_w, stabiliser)
+            for stabiliser in ancilla_stabilisers
+        ]
+        for stabiliser in ancilla_stabilisers:
+            if (stabiliser.x | stabiliser.z) & data_mask:
+                return False
+            reduced = _reduce_by_stabilisers(stabiliser.copy(), stabilisers, n_qubits)
+            if reduced is None:
+                return False
+            vector = (reduced.x << n_qubits) | reduced.z
+            if vector != 0:
+                stabilisers[vector.bit_length() - 1] = reduced
+
+        # On the image, D G D† must act as C G C† for each data generator G.
+        for generator in _get_generators(len(data_qubits)):
+            expected = _conjugate_by_gates(gates_u, generator.copy())
+            result = _conjugate_by_gates(gates_w, generator.copy())
+            difference, exponent = expected.multiply(result)
+            if exponent % 2 == 1:
+                return False
+            difference.sign = exponent // 2
+            reduced = _reduce_by_stabilisers(difference, stabilisers, n_qubits)
+            if reduced is None or reduced != _PauliString():
+                return False
+    return True
@@ -0,0 +1,56 @@
+import random
+
+from pytket.circuit import Circuit, OpType, PhasePolyBox
+
+from topt_proto.gadgetisation import REPLACE_CONDITIONALS, REPLACE_HADAMARDS
+
+# Random circuit builders shared by the test modules.
+
+
+# Random CX + Rz circuit, the Rz angles are multiples of 1/4.
+def build_random_phase_poly_circuit(n_qubits: int, n_cx: int, seed: int) -> Circuit:
+    rng = random.Random(seed)
+    circ = Circuit(n_qubits)
+    for _ in range(n_cx):
+        control, target = rng.sample(range(n_qubits), 2)
+        circ.CX(control, target)
+        if rng.random() < 0.3:
+            circ.Rz(rng.choice([0.25, 0.5, 0.75, 1.25, 1.75]), target)
+    return circ
+
+
+# Random circuit builder in the {H, PhasePolyBox} gateset.
+# Each box acts on a random subset of at most max_box_width qubits and is
+# followed by between one and max_hadamards Hadamard gates.
+def build_random_h_phase_poly_circuit(
+    n_qubits: int,
+    n_boxes: int,
+    seed: int,
+    max_box_width: int = 4,
+    max_hadamards: int = 2,
+) -> Circuit:
+    rng = random.Random(seed)
+    circ = Circuit(n_qubits)
+    for _ in range(n_boxes):
+        width = rng.randint(2, min(n_qubits, max_box_width))
+        box_circ = Circuit(width)
+        for _ in range(2 * width):
+            control, target = rng.sample(range(width), 2)
+            box_circ.CX(control, target)
+            if rng.random() < 0.5:
+                box_circ.Rz(rng.choice([0.25, 0.5, 0.75, 1.25, 1.75]), target)
+        circ.add_gate(PhasePolyBox(box_circ), rng.sample(range(n_qubits), width))
+        for qubit in rng.sample(range(n_qubits), rng.randint(1, max_hadamards)):
+            circ.H(qubit)
+
+    # Gadgetisation needs at least one non-Clifford box.
+    if all(box.is_clifford() for box in circ.ops_of_type(OpType.PhasePolyBox)):
+        circ.add_gate(PhasePolyBox(Circuit(2).CX(0, 1).Rz(0.25, 1)), [0, 1])
+    return circ
+
+
+def gadgetise(circ: Circuit) -> Circuit:
+    gadgetised_circ = circ.copy()
+    REPLACE_HADAMARDS.apply(gadgetised_circ)
+    REPLACE_CONDITIONALS.apply(gadgetised_circ)
+    return gadgetised_circ
@@ -0,0 +1,147 @@
+import time
+
+import pytest
+from pytket.circuit import Circuit, OpType, PhasePolyBox
+
+from topt_proto.gadgetisation import REPLACE_HADAMARDS
+from topt_proto.verification import (
+    check_gadgetisation_statevector,
+    check_gadgetisation_tableau,
+)
+
+from circuit_builders import build_random_h_phase_poly_circuit, gadgetise
+
+
+# (n_qubits, n_boxes, seed), small enough to simulate with the ancillas.
+statevector_cases = [
+    (2, 3, 0),
+    (3, 4, 1),
+    (3, 5, 2),
+    (4, 4, 3),
+    (4, 5, 4),
+    (5, 4, 5),
+]
+
+# (n_qubits, n_boxes, seed), only feasible with the tableau checker.
+tableau_cases = [
+    (4, 5, 4),
+    (20, 15, 6),
+    (60, 30, 7),
+    (120, 40, 8),
+]
+
+
+@pytest.mark.parametrize("n_qubits, n_boxes, seed", statevector_cases)
+def test_statevector_equivalence(
+    n_qubits: int,
+    n_boxes: int,
+    seed: int,
+    record_property,
+) -> None:
+    circ = build_random_h_phase_poly_circuit(n_qubits, n_boxes, seed)
+    start = time.perf_counter()
+    gadgetised_circ = gadgetise(circ)
+    record_property("gadgetisation_time", time.perf_counter() - start)
+    start = time.perf_counter()
+    assert check_gadgetisation_statevector(circ, gadgetised_circ, seed=seed)
+    record_property("check_time", time.perf_counter() - start)
+
+
+@pytest.mark.parametrize("n_qubits, n_boxes, seed", tableau_cases)
+def test_tableau_equivalence(
+    n_qubits: int,
+    n_boxes: int,
+    seed: int,
+    record_property,
+) -> None:
+    circ = build_random_h_phase_poly_circuit(n_qubits, n_boxes, seed, max_box_width=8)
+    start = time.perf_counter()
+    gadgetised_circ = gadgetise(circ)
+    record_property("gadgetisation_time", time.perf_counter() - start)
+    start = time.perf_counter()
+    assert check_gadgetisation_tableau(circ, gadgetised_circ)
+    record_property("check_time", time.perf_counter() - start)
+
+
+def test_equivalence_checkers_detect_errors() -> None:
+    circ = build_random_h_phase_poly_circuit(3, 4, seed=9)
+    gadgetised_circ = gadgetise(circ)
+
+    # Drop the first deferred correction.
+    broken_circ = Circuit()
+    for qubit in gadgetised_circ.qubits:
+        broken_circ.add_qubit(qubit)
+    dropped = False
+    for cmd in gadgetised_circ:
+        if cmd.op.type == OpType.CX and not dropped:
+            dropped = True
+        elif cmd.op.type == OpType.Barrier:
+            broken_circ.add_barrier(cmd.qubits)
+        else:
+            broken_circ.add_gate(cmd.op, cmd.qubits)
+    assert dropped
+    assert not check_gadgetisation_statevector(circ, broken_circ, seed=0)
+    assert not check_gadgetisation_tableau(circ, broken_circ)
+
+    # An extra Hadamard on a data qubit.
+    gadgetised_circ.H(0)
+    assert not check_gadgetisation_statevector(circ, gadgetised_circ, seed=0)
+    assert not check_gadgetisation_tableau(circ, gadgetised_circ)
+
+
+# Rebuild W with a phase of the box at box_index shifted by delta.
+def shift_box_phase(circ: Circuit, box_index: int, delta: float) -> Circuit:
+    circ_prime = Circuit()
+    for qubit in circ.qubits:
+        circ_prime.add_qubit(qubit)
+    boxes = [cmd for cmd in circ if cmd.op.type == OpType.PhasePolyBox]
+    for cmd in circ:
+        if cmd == boxes[box_index]:
+            pbox = cmd.op
+            phase_poly = dict(pbox.phase_polynomial)
+            parity = next(iter(phase_poly), (True,) * pbox.n_qubits)
+            phase_poly[parity] = phase_poly.get(parity, 0.0) + delta
+            pbox = PhasePolyBox(
+                pbox.n_qubits,
+                pbox.qubit_indices,
+                phase_poly,
+                pbox.linear_transformation,
+            )
+            circ_prime.add_gate(pbox, cmd.qubits)
+        elif cmd.op.type == OpType.Barrier:
+            circ_prime.add_barrier(cmd.qubits)
+        else:
+            circ_prime.add_gate(cmd.op, cmd.qubits)
+    return circ_prime
+
+
+@pytest.mark.parametrize("delta", [1.0, 0.5, 0.25])
+def test_equivalence_checkers_detect_phase_errors(delta: float) -> None:
+    # Doubling the phases would map θ and θ + 1 to the same Clifford box.
+    circ = build_random_h_phase_poly_circuit(3, 4, seed=9)
+    broken_circ = shift_box_phase(gadgetise(circ), 0, delta)
+    assert not check_gadgetisation_statevector(circ, broken_circ, seed=0)
+    assert not check_gadgetisation_tableau(circ, broken_circ)
+
+
+@pytest.mark.parametrize("n_qubits, n_boxes, seed", statevector_cases)
+def test_equivalence_checkers_agree(n_qubits: int, n_boxes: int, seed: int) -> None:
+    circ = build_random_h_phase_poly_circuit(n_qubits, n_boxes, seed)
+    gadgetised_circ = gadgetise(circ)
+    n_boxes = gadgetised_circ.n_gates_of_type(OpType.PhasePolyBox)
+    for box_index in range(n_boxes):
+        broken_circ = shift_box_phase(gadgetised_circ, box_index, 1.0)
+        assert check_gadgetisation_tableau(
+            circ,
+            broken_circ,
+        ) == check_gadgetisation_statevector(circ, broken_circ, seed=seed)
+
+
+def test_equivalence_requires_deferred_measurement() -> None:
+    circ = build_random_h_phase_poly_circuit(3, 3, seed=10)
+    gadgetised_circ = circ.copy()
+    REPLACE_HADAMARDS.apply(gadgetised_circ)
+    if gadgetised_circ.n_gates_of_type(OpType.Measure) == 0:
+        pytest.skip("No internal Hadamards in this circuit.")
+    with pytest.raises(ValueError):
+        check_gadgetisation_tableau(circ, gadgetised_circ)
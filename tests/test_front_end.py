@@ -0,0 +1,123 @@
+import random
+from glob import glob
+
+import numpy as np
+import pytest
+from pytket import Qubit
+from pytket.circuit import Circuit, OpType
+from pytket.passes import ComposePhasePolyBoxes
+from pytket.qasm.qasm import circuit_from_qasm
+from pytket.utils import compare_unitaries
+
+from topt_proto.front_end import REBASE_TO_PHASE_POLY, rebase_to_phase_poly
+from topt_proto.gadgetisation import (
+    HADAMARD_REPLACE_PREDICATE,
+    get_n_internal_hadamards,
+)
+from topt_proto.utils import REPLACE_T_WITH_RZ
+from topt_proto.verification import check_gadgetisation_statevector
+
+from circuit_builders import gadgetise
+
+
+circuit_files = glob("qasm/*.qasm")
+
+single_qubit_gates = ["T", "Tdg", "S", "Sdg", "Z", "X", "H"]
+two_qubit_gates = ["CX", "CZ", "SWAP"]
+
+
+# Random Clifford+T circuit over every gate handled by the front end.
+def build_random_clifford_t_circuit(n_qubits: int, n_gates: int, seed: int) -> Circuit:
+    rng = random.Random(seed)
+    circ = Circuit(n_qubits)
+    for _ in range(n_gates):
+        if n_qubits > 1 and rng.random() < 0.4:
+            gate = rng.choice(two_qubit_gates)
+            getattr(circ, gate)(*rng.sample(range(n_qubits), 2))
+        elif rng.random() < 0.1:
+            circ.Rz(rng.choice([0.25, 0.3, 1.75]), rng.randrange(n_qubits))
+        else:
+            getattr(circ, rng.choice(single_qubit_gates))(rng.randrange(n_qubits))
+    return circ
+
+
+def toffoli(circ: Circuit, a: int, b: int, c: int) -> Circuit:
+    circ.H(c).CX(b, c).Tdg(c).CX(a, c).T(c).CX(b, c).Tdg(c).CX(a, c)
+    circ.T(b).T(c).H(c).CX(a, b).T(a).Tdg(b).CX(a, b)
+    return circ
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_circuit_unitary(seed: int) -> None:
+    circ = build_random_clifford_t_circuit(4, 30, seed)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert HADAMARD_REPLACE_PREDICATE.verify(phase_poly_circ)
+    # The global phase is tracked exactly.
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+
+@pytest.mark.parametrize("qasm_file", circuit_files)
+def test_qasm_matches_compose_pipeline(qasm_file: str) -> None:
+    circ = circuit_from_qasm(qasm_file)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert phase_poly_circ.n_gates_of_type(OpType.PhasePolyBox) == 1
+    assert phase_poly_circ.n_gates == 1
+
+    composed_circ = circ.copy()
+    REPLACE_T_WITH_RZ.apply(composed_circ)
+    ComposePhasePolyBoxes().apply(composed_circ)
+    # REPLACE_T_WITH_RZ drops the global phase of each T gate.
+    assert compare_unitaries(composed_circ.get_unitary(), phase_poly_circ.get_unitary())
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+
+def test_x_frame() -> None:
+    # The X gates pass through to the end and cancel.
+    circ = Circuit(2).X(0).T(0).CX(0, 1).T(1).CX(0, 1).X(1).X(0).CX(0, 1).X(1)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert phase_poly_circ.n_gates == 1
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+    # An X on a Hadamard is absorbed as a Z.
+    circ = Circuit(1).X(0).H(0).T(0)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert phase_poly_circ.n_gates_of_type(OpType.H) == 1
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+
+def test_hadamards_commute_past_idle_regions() -> None:
+    # The Hadamards on qubit 2 do not split the region on qubits 0 and 1.
+    circ = Circuit(3).CX(0, 1).T(1).H(2).CX(0, 1).H(2).T(0)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert phase_poly_circ.n_gates_of_type(OpType.PhasePolyBox) == 1
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+
+def test_gadgetise_front_end_output() -> None:
+    circ = toffoli(Circuit(4), 0, 1, 2)
+    circ.T(2).CX(2, 1).T(1)
+    toffoli(circ, 0, 1, 2)
+    phase_poly_circ = rebase_to_phase_poly(circ)
+    assert get_n_internal_hadamards(phase_poly_circ) == 2
+    assert check_gadgetisation_statevector(
+        phase_poly_circ,
+        gadgetise(phase_poly_circ),
+        seed=0,
+    )
+
+
+def test_registers_are_preserved() -> None:
+    circ = Circuit()
+    qreg = circ.add_q_register("data", 2)
+    ancilla = Qubit("ancilla", 0)
+    circ.add_qubit(ancilla)
+    circ.T(qreg[0]).CX(qreg[0], ancilla).H(qreg[1]).S(ancilla).CZ(qreg[1], ancilla)
+    phase_poly_circ = circ.copy()
+    REBASE_TO_PHASE_POLY.apply(phase_poly_circ)
+    assert phase_poly_circ.qubits == circ.qubits
+    assert np.allclose(circ.get_unitary(), phase_poly_circ.get_unitary())
+
+
+def test_unsupported_gate() -> None:
+    with pytest.raises(NotImplementedError):
+        rebase_to_phase_poly(Circuit(2).CRy(0.25, 0, 1))
@@ -0,0 +1,72 @@
+import pytest
+
+from pytket.circuit import Circuit, OpType, PhasePolyBox
+from pytket.passes import DecomposeBoxes, ComposePhasePolyBoxes
+from pytket.utils import compare_unitaries
+
+from topt_proto.gadgetisation import get_n_internal_hadamards
+from topt_proto.hadamard_reduction import (
+    MINIMISE_HADAMARDS,
+    minimise_hadamards_with_counts,
+)
+
+
+t_box = PhasePolyBox(Circuit(2).CX(0, 1).Rz(0.25, 1).CX(0, 1))
+s_box = PhasePolyBox(Circuit(2).Rz(0.5, 0))
+cx_box = PhasePolyBox(Circuit(2).CX(0, 1))
+
+# The Clifford box in the middle acts trivially on qubit 1, so the two
+# internal Hadamards on qubit 1 cancel.
+circ0 = (
+    Circuit(2)
+    .add_gate(t_box, [0, 1])
+    .H(1)
+    .add_gate(s_box, [0, 1])
+    .H(1)
+    .add_gate(t_box, [0, 1])
+)
+
+# Two Clifford boxes on qubits 0 and 1 sit between the Hadamards on qubit 2.
+circ1 = (
+    Circuit(3)
+    .add_gate(t_box, [0, 1])
+    .H(2)
+    .add_gate(cx_box, [0, 1])
+    .add_gate(s_box, [1, 0])
+    .H(2)
+    .add_gate(t_box, [1, 2])
+)
+
+# Nothing to remove here, the Hadamard is genuinely internal.
+circ2 = Circuit(2).add_gate(t_box, [0, 1]).H(0).add_gate(t_box, [0, 1])
+
+reducible_circuits = [(circ0, 2, 0), (circ1, 2, 0), (circ2, 1, 1)]
+
+
+@pytest.mark.parametrize("circ, n_before, n_after", reducible_circuits)
+def test_hadamard_minimisation(circ: Circuit, n_before: int, n_after: int) -> None:
+    circ_prime, before, after = minimise_hadamards_with_counts(circ)
+    assert (before, after) == (n_before, n_after)
+    assert get_n_internal_hadamards(circ_prime) == n_after
+    assert compare_unitaries(circ.get_unitary(), circ_prime.get_unitary())
+
+
+def test_clifford_box_absorption() -> None:
+    circ = circ0.copy()
+    MINIMISE_HADAMARDS.apply(circ)
+    assert circ.n_gates_of_type(OpType.H) == 0
+    assert circ.n_gates_of_type(OpType.PhasePolyBox) == 2
+
+
+def test_hadamard_minimisation_never_increases() -> None:
+    circ = Circuit(4).CCX(0, 1, 2).T(2).CX(2, 1).T(1).CCX(0, 1, 2).H(3).T(3)
+    DecomposeBoxes().apply(circ)
+    ComposePhasePolyBoxes().apply(circ)
+    circ_prime, before, after = minimise_hadamards_with_counts(circ)
+    assert after <= before
+    assert compare_unitaries(circ.get_unitary(), circ_prime.get_unitary())
+
+
+def test_hadamard_minimisation_gateset() -> None:
+    with pytest.raises(ValueError):
+        minimise_hadamards_with_counts(Circuit(2).CX(0, 1).T(1))
@@ -0,0 +1,132 @@
+import pytest
+from pytket.architecture import Architecture
+from pytket.circuit import Circuit, OpType, PhasePolyBox
+from pytket.unit_id import Node
+
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.incremental import (
+    IncrementalCompiler,
+    get_box_fingerprint,
+    get_pauli_fingerprint,
+)
+from topt_proto.utils import tensor_from_x_index
+from topt_proto.verification import check_gadgetisation_tableau
+
+from circuit_builders import build_random_h_phase_poly_circuit, gadgetise
+
+
+# Rebuild a Circuit with the box at box_index replaced.
+def replace_box(circ: Circuit, box_index: int, pbox: PhasePolyBox) -> Circuit:
+    circ_prime = Circuit(circ.n_qubits)
+    count = 0
+    for cmd in circ:
+        if cmd.op.type == OpType.PhasePolyBox:
+            circ_prime.add_gate(pbox if count == box_index else cmd.op, cmd.qubits)
+            count += 1
+        else:
+            circ_prime.add_gate(cmd.op, cmd.qubits)
+    return circ_prime
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_full_compile(seed: int) -> None:
+    circ = build_random_h_phase_poly_circuit(8, 20, seed, max_box_width=5)
+    gadgetised_circ = IncrementalCompiler().gadgetise(circ)
+    assert gadgetised_circ == gadgetise(circ)
+    assert check_gadgetisation_tableau(circ, gadgetised_circ)
+
+
+def test_synthesis_cache_across_box_edit() -> None:
+    circ = build_random_h_phase_poly_circuit(8, 20, seed=11, max_box_width=4)
+    compiler = IncrementalCompiler()
+
+    def synthesise_all(circ: Circuit) -> None:
+        for cmd in circ:
+            if cmd.op.type == OpType.PhasePolyBox:
+                pauli = tensor_from_x_index(0, cmd.op.n_qubits)
+                compiler.synthesise_clifford(cmd.op, pauli)
+
+    synthesise_all(circ)
+    n_misses = compiler.n_synthesis_misses
+
+    # Only the edited box is synthesised again.
+    boxes = [cmd.op for cmd in circ if cmd.op.type == OpType.PhasePolyBox]
+    width = boxes[10].n_qubits
+    box_circ = Circuit(width).CX(0, 1).Rz(0.75, 1).CX(1, 0).Rz(0.25, 0)
+    synthesise_all(replace_box(circ, 10, PhasePolyBox(box_circ)))
+    assert compiler.n_synthesis_misses == n_misses + 1
+
+
+def test_synthesis_options_are_cached_apart() -> None:
+    pbox = PhasePolyBox(Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.75, 2))
+    pauli = tensor_from_x_index(1, 3)
+    architecture = Architecture([(0, 1), (1, 2), (2, 3)])
+    compiler = IncrementalCompiler()
+    results = [
+        compiler.synthesise_clifford(pbox, pauli),
+        compiler.synthesise_clifford(pbox, pauli, verify=True),
+        compiler.synthesise_clifford(pbox, pauli, architecture=architecture),
+        compiler.synthesise_clifford(
+            pbox,
+            pauli,
+            architecture=architecture,
+            placement=[Node(3), Node(2), Node(1)],
+        ),
+    ]
+    assert compiler.n_synthesis_misses == 4
+    assert results[-1] == synthesise_clifford(
+        pbox,
+        pauli,
+        architecture=architecture,
+        placement=[Node(3), Node(2), Node(1)],
+    )
+    compiler.synthesise_clifford(pbox, pauli, architecture=architecture)
+    assert compiler.n_synthesis_hits == 1
+
+
+def test_requires_non_clifford_box() -> None:
+    circ = Circuit(2).H(0).add_gate(PhasePolyBox(Circuit(2).CX(0, 1)), [0, 1]).H(1)
+    with pytest.raises(ValueError):
+        IncrementalCompiler().gadgetise(circ)
+
+
+def test_fingerprints() -> None:
+    circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2)
+    # Equal contents built in different ways give equal fingerprints.
+    assert get_box_fingerprint(PhasePolyBox(circ)) == get_box_fingerprint(
+        PhasePolyBox(circ.copy())
+    )
+    assert get_box_fingerprint(PhasePolyBox(circ)) != get_box_fingerprint(
+        PhasePolyBox(circ.copy().Rz(0.25, 0))
+    )
+    assert get_pauli_fingerprint(tensor_from_x_index(1, 3)) == get_pauli_fingerprint(
+        tensor_from_x_index(1, 5)
+    )
+    assert get_pauli_fingerprint(tensor_from_x_index(1, 3)) != get_pauli_fingerprint(
+        tensor_from_x_index(2, 3)
+    )
+
+
+def test_synthesis_cache() -> None:
+    circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.75, 2)
+    compiler = IncrementalCompiler()
+    for _ in range(3):
+        for index in range(3):
+            pauli = tensor_from_x_index(index, 3)
+            clifford_circ = compiler.synthesise_clifford(PhasePolyBox(circ), pauli)
+            assert clifford_circ == synthesise_clifford(PhasePolyBox(circ), pauli)
+            # Callers can modify the returned Circuit.
+            clifford_circ.H(0)
+    assert compiler.n_synthesis_misses == 3
+    assert compiler.n_synthesis_hits == 6
+
+
+def test_synthesis_cache_is_bounded() -> None:
+    circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.75, 2)
+    compiler = IncrementalCompiler(max_synthesis_cache_size=2)
+    for index in [0, 1, 0, 2, 0, 1]:
+        compiler.synthesise_clifford(PhasePolyBox(circ), tensor_from_x_index(index, 3))
+    # X_1 was evicted by X_2, X_0 was kept as it was used more recently.
+    assert compiler.n_synthesis_misses == 4
+    assert compiler.n_synthesis_hits == 2
+    assert len(compiler._synthesis_cache) == 2
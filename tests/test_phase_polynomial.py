@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from pytket.circuit import Circuit, PhasePolyBox
+from pytket.utils import compare_unitaries
+
+from topt_proto.clifford import _parities_to_pauli_tensors, get_updated_paulis
+from topt_proto.phase_polynomial import (
+    get_linear_transformation_rows,
+    get_sparse_phase_polynomial,
+    get_t_count,
+    indices_to_mask,
+    mask_to_indices,
+    mask_to_parity,
+    parity_to_mask,
+    phase_poly_box_from_parities,
+)
+from topt_proto.utils import tensor_from_x_index
+
+
+def test_parity_packing() -> None:
+    parity = (True, False, False, True, True)
+    mask = parity_to_mask(parity)
+    assert mask == 0b11001
+    assert mask_to_indices(mask) == [0, 3, 4]
+    assert indices_to_mask([4, 0, 3]) == mask
+    assert mask_to_parity(mask, 5) == parity
+
+
+def test_index_lists_are_checked() -> None:
+    # A dense bool parity is not a list of indices.
+    with pytest.raises(TypeError):
+        indices_to_mask((True, False, True))
+    with pytest.raises(TypeError):
+        phase_poly_box_from_parities(3, {(True, False, True): 0.25})
+    with pytest.raises(TypeError):
+        phase_poly_box_from_parities(3, {True: 0.25})
+    with pytest.raises(ValueError):
+        indices_to_mask([1, 2, 1])
+
+
+def test_linear_rows_are_checked() -> None:
+    # A negative bitset used to hang in mask_to_indices.
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {1: 0.25}, [-1, 2])
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {1: 0.25}, [0b001, 0b100])
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {1: 0.25}, [(0,), (2,)])
+    # Singular maps.
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {1: 0.25}, [1, 1])
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(3, {1: 0.25}, [0b011, 0b110, 0b101])
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {-1: 0.25})
+    with pytest.raises(ValueError):
+        mask_to_indices(-1)
+
+
+def test_sparse_accessors() -> None:
+    circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.5, 2).Rz(1.75, 0)
+    pbox = PhasePolyBox(circ)
+    assert get_sparse_phase_polynomial(pbox) == {
+        0b011: 0.25,
+        0b111: 0.5,
+        0b001: 1.75,
+    }
+    assert get_linear_transformation_rows(pbox) == [0b001, 0b011, 0b111]
+    assert get_t_count(pbox) == 2
+
+
+def test_box_from_parities() -> None:
+    circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.5, 2).Rz(1.75, 0)
+    # Bitsets and index lists can be mixed.
+    pbox = phase_poly_box_from_parities(
+        3,
+        {0b011: 0.25, (0, 1, 2): 0.5, (0,): 1.75},
+        linear_rows=[0b001, (0, 1), 0b111],
+    )
+    assert compare_unitaries(circ.get_unitary(), pbox.get_circuit().get_unitary())
+
+
+def test_box_from_parities_identity() -> None:
+    pbox = phase_poly_box_from_parities(4, {(1, 3): 0.25, (1, 3, 2): 0.75})
+    assert np.array_equal(pbox.linear_transformation, np.eye(4, dtype=bool))
+    assert get_sparse_phase_polynomial(pbox) == {0b1010: 0.25, 0b1110: 0.75}
+    with pytest.raises(ValueError):
+        phase_poly_box_from_parities(2, {(0, 2): 0.25})
+
+
+def test_sparse_pauli_tensors() -> None:
+    n_qubits = 200
+    pbox = phase_poly_box_from_parities(n_qubits, {(3, 150): 0.25, (199,): 0.75})
+    _, tensors, phases = _parities_to_pauli_tensors(pbox)
+    assert sorted(len(tensor.string.map) for tensor in tensors) == [1, 2]
+    # Numerical phases are also the coefficients, as get_updated_paulis expects.
+    assert [tensor.coeff for tensor in tensors] == phases
+    pauli_op = tensor_from_x_index(x_index=3, n_qubits=n_qubits)
+    q_sequence = get_updated_paulis(tensors, pauli_op)
+    assert [tensor.coeff for tensor in q_sequence] == [-0.5]
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pytket.circuit import Circuit, PhasePolyBox
+
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.gadgetisation import gadgetise_hadamards
+from topt_proto.service import (
+    CompileClient,
+    CompileServer,
+    pauli_to_dict,
+    pbox_to_dict,
+)
+from topt_proto.utils import tensor_from_x_index
+
+from circuit_builders import build_random_h_phase_poly_circuit, gadgetise
+
+
+# Thread pool whose jobs wait until the gate is opened, so that requests can
+# be made to overlap deterministically.
+class GatedExecutor(ThreadPoolExecutor):
+    def __init__(self) -> None:
+        super().__init__(max_workers=1)
+        self.gate = threading.Event()
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(self._run, fn, *args, **kwargs)
+
+    def _run(self, fn, *args, **kwargs):
+        self.gate.wait(timeout=10)
+        return fn(*args, **kwargs)
+
+
+pbox = PhasePolyBox(Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.75, 2))
+
+
+async def wait_until(condition) -> None:
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+def test_process_pool_service(tmp_path) -> None:
+    socket_path = str(tmp_path / "topt.sock")
+    circ = build_random_h_phase_poly_circuit(4, 5, seed=1)
+
+    async def run() -> None:
+        server = CompileServer(n_workers=2)
+        await server.start_unix(socket_path)
+        client = await CompileClient.connect_unix(socket_path)
+        try:
+            pauli = tensor_from_x_index(1, 3)
+            clifford_circ, gadgetised_circ, deferred_circ = await asyncio.gather(
+                client.synthesise_clifford(pbox, pauli),
+                client.gadgetise_hadamards(circ),
+                client.gadgetise_hadamards(circ, replace_conditionals=True),
+            )
+            assert clifford_circ == synthesise_clifford(pbox, pauli)
+            assert gadgetised_circ == gadgetise_hadamards(circ)
+            assert deferred_circ == gadgetise(circ)
+        finally:
+            await client.close()
+            await server.close()
+
+    asyncio.run(run())
+
+
+def test_coalescing(tmp_path) -> None:
+    socket_path = str(tmp_path / "topt.sock")
+    executor = GatedExecutor()
+
+    async def run() -> None:
+        server = CompileServer(executor=executor)
+        await server.start_unix(socket_path)
+        clients = [await CompileClient.connect_unix(socket_path) for _ in range(3)]
+        try:
+            # Two clients ask for the same synthesis twice each, the third
+            #  asks for a different one.
+            requests = [
+                clients[n % 2].synthesise_clifford(pbox, tensor_from_x_index(0, 3))
+                for n in range(4)
+            ]
+            requests.append(
+                clients[2].synthesise_clifford(pbox, tensor_from_x_index(2, 3))
+            )
+            results = asyncio.gather(*requests)
+            await wait_until(lambda: server.n_requests == 5)
+            executor.gate.set()
+            circs = await results
+
+            assert server.n_computations == 2
+            assert server.n_coalesced == 3
+            expected = synthesise_clifford(pbox, tensor_from_x_index(0, 3))
+            assert all(circ == expected for circ in circs[:4])
+            assert circs[4] == synthesise_clifford(pbox, tensor_from_x_index(2, 3))
+        finally:
+            for client in clients:
+                await client.close()
+            await server.close()
+
+    asyncio.run(run())
+    executor.shutdown()
+
+
+def test_coalescing_equal_boxes() -> None:
+    executor = GatedExecutor()
+    box_circ = Circuit(3).CX(0, 1).Rz(0.25, 1).CX(1, 2).Rz(0.75, 2)
+    circ = build_random_h_phase_poly_circuit(4, 5, seed=1)
+
+    async def run() -> None:
+        server = CompileServer(executor=executor)
+        port = await server.start_tcp()
+        clients = [await CompileClient.connect_tcp(port=port) for _ in range(2)]
+        try:
+            # Each client builds its own boxes, which get different ids.
+            pauli = tensor_from_x_index(0, 3)
+            requests = [
+                clients[0].synthesise_clifford(PhasePolyBox(box_circ), pauli),
+                clients[1].synthesise_clifford(PhasePolyBox(box_circ.copy()), pauli),
+                clients[0].gadgetise_hadamards(circ),
+                clients[1].gadgetise_hadamards(
+                    build_random_h_phase_poly_circuit(4, 5, seed=1)
+                ),
+            ]
+            results = asyncio.gather(*requests)
+            await wait_until(lambda: server.n_requests == 4)
+            executor.gate.set()
+            circs = await results
+
+            assert server.n_computations == 2
+            assert server.n_coalesced == 2
+            assert circs[0] == circs[1] == synthesise_clifford(pbox, pauli)
+            assert circs[2] == circs[3] == gadgetise_hadamards(circ)
+        finally:
+            for client in clients:
+                await client.close()
+            await server.close()
+
+    asyncio.run(run())
+    executor.shutdown()
+
+
+def test_backpressure() -> None:
+    executor = GatedExecutor()
+
+    async def run() -> None:
+        server = CompileServer(executor=executor, max_queue_size=1, n_workers=1)
+        port = await server.start_tcp()
+        client = await CompileClient.connect_tcp(port=port)
+        try:
+            requests = asyncio.gather(
+                *(
+                    client.synthesise_clifford(pbox, tensor_from_x_index(n, 3))
+                    for n in range(3)
+                )
+            )
+            # One job is running and one is queued, the last request is
+            #  waiting for space in the queue.
+            await wait_until(lambda: server.n_requests == 3)
+            await asyncio.sleep(0.05)
+            assert server.n_computations == 1
+            assert server.queue_size == 1
+            executor.gate.set()
+            assert len(await requests) == 3
+            assert server.n_computations == 3
+        finally:
+            await client.close()
+            await server.close()
+
+    asyncio.run(run())
+    executor.shutdown()
+
+
+def test_errors_are_returned() -> None:
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def run() -> None:
+        server = CompileServer(executor=executor)
+        port = await server.start_tcp()
+        client = await CompileClient.connect_tcp(port=port)
+        try:
+            # No non-Clifford box, so gadgetisation fails.
+            circ = Circuit(2).H(0).add_gate(PhasePolyBox(Circuit(2).CX(0, 1)), [0, 1])
+            with pytest.raises(RuntimeError):
+                await client.gadgetise_hadamards(circ)
+            with pytest.raises(RuntimeError, match="Unknown method"):
+                await client._request("compile_everything", {})
+            # The connection is still usable afterwards.
+            pauli = tensor_from_x_index(0, 3)
+            assert await client.synthesise_clifford(pbox, pauli) == synthesise_clifford(
+                pbox, pauli
+            )
+        finally:
+            await client.close()
+            await server.close()
+
+    asyncio.run(run())
+    executor.shutdown()
+
+
+def test_malformed_requests() -> None:
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    async def run() -> None:
+        server = CompileServer(executor=executor)
+        port = await server.start_tcp()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            lines = [b"not json", b"[1, 2]", b'{"method": "synthesise_clifford"}']
+            lines.append(b'{"id": 7, "method": "synthesise_clifford", "params": {}}')
+            for line in lines:
+                writer.write(line + b"\n")
+            await writer.drain()
+            responses = [json.loads(await reader.readline()) for _ in lines]
+            assert all("error" in response for response in responses)
+            assert sorted(response["id"] or 0 for response in responses) == [0, 0, 0, 7]
+
+            # The connection is still usable afterwards.
+            request = {
+                "id": 8,
+                "method": "synthesise_clifford",
+                "params": {"pbox": pbox_to_dict(pbox), "pauli": pauli_to_dict(pauli)},
+            }
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            assert response["id"] == 8
+            assert Circuit.from_dict(response["result"]) == synthesise_clifford(
+                pbox, pauli
+            )
+        finally:
+            writer.close()
+            await server.close()
+
+    pauli = tensor_from_x_index(0, 3)
+    asyncio.run(run())
+    executor.shutdown()
+
+
+def test_close_fails_pending_requests() -> None:
+    executor = GatedExecutor()
+
+    async def run() -> None:
+        server = CompileServer(executor=executor, max_queue_size=1, n_workers=1)
+        port = await server.start_tcp()
+        client = await CompileClient.connect_tcp(port=port)
+        try:
+            # One request is running, one is queued and one waits for space.
+            requests = asyncio.gather(
+                *(
+                    client.synthesise_clifford(pbox, tensor_from_x_index(n, 3))
+                    for n in range(3)
+                ),
+                return_exceptions=True,
+            )
+            await wait_until(lambda: server.n_requests == 3)
+            await asyncio.wait_for(server.close(), timeout=5)
+            results = await asyncio.wait_for(requests, timeout=5)
+            assert all(isinstance(result, RuntimeError) for result in results)
+        finally:
+            executor.gate.set()
+            await client.close()
+
+    asyncio.run(run())
+    executor.shutdown()
@@ -0,0 +1,140 @@
+import pytest
+from pytket import Qubit
+from pytket.architecture import Architecture, RingArch, SquareGrid
+from pytket.circuit import Circuit, PhasePolyBox
+from pytket.predicates import ConnectivityPredicate
+from pytket.unit_id import Node
+from pytket.utils import compare_unitaries
+
+from topt_proto.clifford import get_cnot_circuit, synthesise_clifford
+from topt_proto.steiner import Placement, get_adjacency, get_placement
+from topt_proto.symbolic import CliffordTemplate
+from topt_proto.utils import tensor_from_x_index
+from topt_proto.verification import verify_clifford_synthesis
+
+from circuit_builders import build_random_phase_poly_circuit
+
+
+def line(n_qubits: int) -> Architecture:
+    return Architecture([(n, n + 1) for n in range(n_qubits - 1)])
+
+
+# (architecture, n_qubits)
+architectures = [
+    (line(5), 5),
+    (RingArch(6), 6),
+    (SquareGrid(3, 3), 9),
+    (Architecture([(0, 1), (1, 2), (1, 3), (3, 4), (4, 5), (4, 6)]), 7),
+]
+
+
+# Check a Circuit acts on the placed nodes, and rename node placement[n] back
+#  to Qubit(n) to compare it with the PhasePolyBox.
+def unplace(
+    circ: Circuit,
+    architecture: Architecture,
+    placement: Placement | None = None,
+) -> Circuit:
+    nodes = get_placement(architecture, circ.n_qubits, placement)
+    assert set(circ.qubits) == set(nodes)
+    assert ConnectivityPredicate(architecture).verify(circ)
+    unplaced_circ = circ.copy()
+    unplaced_circ.rename_units({node: Qubit(n) for n, node in enumerate(nodes)})
+    return unplaced_circ
+
+
+@pytest.mark.parametrize("architecture, n_qubits", architectures)
+@pytest.mark.parametrize("seed", range(3))
+def test_steiner_gauss(architecture: Architecture, n_qubits: int, seed: int) -> None:
+    pbox = PhasePolyBox(build_random_phase_poly_circuit(n_qubits, 4 * n_qubits, seed))
+    cnot_circ = unplace(get_cnot_circuit(pbox, architecture=architecture), architecture)
+    assert compare_unitaries(
+        get_cnot_circuit(pbox).get_unitary(),
+        cnot_circ.get_unitary(),
+    )
+
+
+@pytest.mark.parametrize("architecture, n_qubits", architectures)
+def test_synthesise_clifford_on_architecture(
+    architecture: Architecture,
+    n_qubits: int,
+) -> None:
+    pbox = PhasePolyBox(build_random_phase_poly_circuit(n_qubits, 4 * n_qubits, seed=7))
+    for index in range(n_qubits):
+        pauli_op = tensor_from_x_index(x_index=index, n_qubits=n_qubits)
+        clifford_circ = unplace(
+            synthesise_clifford(pbox, pauli_op, architecture=architecture),
+            architecture,
+        )
+        assert verify_clifford_synthesis(pbox, pauli_op, clifford_circ)
+        # Same operator as without the Architecture.
+        assert compare_unitaries(
+            synthesise_clifford(pbox, pauli_op).get_unitary(),
+            clifford_circ.get_unitary(),
+        )
+
+
+def test_symbolic_template_on_architecture() -> None:
+    architecture = line(4)
+    pbox = PhasePolyBox(build_random_phase_poly_circuit(4, 12, seed=5))
+    pauli_op = tensor_from_x_index(x_index=1, n_qubits=4)
+    template = CliffordTemplate(pbox, pauli_op, architecture=architecture)
+    clifford_circ = unplace(template.bind({}), architecture)
+    assert verify_clifford_synthesis(pbox, pauli_op, clifford_circ)
+
+
+def grid_node(row: int, column: int) -> Node:
+    return Node("gridNode", row, column, 0)
+
+
+@pytest.mark.parametrize(
+    "placement",
+    [
+        None,
+        # The second row and the end of the last column of a 4x4 grid.
+        [
+            grid_node(1, 0),
+            grid_node(1, 1),
+            grid_node(1, 2),
+            grid_node(1, 3),
+            grid_node(2, 3),
+        ],
+        {
+            4: grid_node(0, 0),
+            0: grid_node(0, 1),
+            1: grid_node(1, 1),
+            3: grid_node(2, 1),
+            2: grid_node(2, 2),
+        },
+    ],
+)
+def test_synthesise_clifford_on_placement(placement: Placement | None) -> None:
+    # A 5 qubit box on part of a larger Architecture.
+    architecture = SquareGrid(4, 4)
+    pbox = PhasePolyBox(build_random_phase_poly_circuit(5, 20, seed=3))
+    for index in range(5):
+        pauli_op = tensor_from_x_index(x_index=index, n_qubits=5)
+        clifford_circ = synthesise_clifford(
+            pbox,
+            pauli_op,
+            architecture=architecture,
+            placement=placement,
+        )
+        clifford_circ = unplace(clifford_circ, architecture, placement)
+        assert verify_clifford_synthesis(pbox, pauli_op, clifford_circ)
+
+
+def test_invalid_placements() -> None:
+    with pytest.raises(ValueError):
+        get_adjacency(line(4), 5)
+    with pytest.raises(ValueError):
+        get_adjacency(Architecture([(0, 1), (2, 3)]), 4)
+    # Nodes 0 and 2 are not neighbours.
+    with pytest.raises(ValueError):
+        get_adjacency(line(4), 2, [Node(0), Node(2)])
+    with pytest.raises(ValueError):
+        get_adjacency(line(4), 2, [Node(0), Node(0)])
+    with pytest.raises(ValueError):
+        get_adjacency(line(4), 2, [Node(0), Node(5)])
+    with pytest.raises(ValueError):
+        get_adjacency(line(4), 2, {0: Node(0), 2: Node(1)})
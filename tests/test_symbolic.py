@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from pytket.circuit import Circuit, OpType, PhasePolyBox
+from pytket.predicates import CliffordCircuitPredicate
+from pytket.utils import compare_unitaries
+from sympy import Symbol
+
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.gadgetisation import REPLACE_HADAMARDS
+from topt_proto.symbolic import CliffordTemplate, bind_circuit
+from topt_proto.utils import check_rz_angles, tensor_from_x_index
+
+
+a = Symbol("a")
+b = Symbol("b")
+
+
+def build_phase_poly_circuit(alpha, beta) -> Circuit:
+    return (
+        Circuit(3)
+        .CX(0, 1)
+        .Rz(alpha, 1)
+        .CX(1, 2)
+        .Rz(beta, 2)
+        .CX(0, 2)
+        .Rz(0.25, 0)
+        .CX(1, 0)
+        .Rz(alpha, 0)
+    )
+
+
+bindings = [(0.25, 0.75), (1.75, -0.25), (0.5, 1.25)]
+
+
+@pytest.mark.parametrize("alpha, beta", bindings)
+def test_template_matches_synthesis(alpha: float, beta: float) -> None:
+    pauli_op = tensor_from_x_index(x_index=1, n_qubits=3)
+    template = CliffordTemplate(
+        PhasePolyBox(build_phase_poly_circuit(a, b)),
+        pauli_op,
+    )
+    clifford_circ = template.bind({a: alpha, b: beta})
+    assert CliffordCircuitPredicate().verify(clifford_circ)
+    expected_circ = synthesise_clifford(
+        pbox=PhasePolyBox(build_phase_poly_circuit(alpha, beta)),
+        input_pauli=pauli_op,
+    )
+    assert compare_unitaries(clifford_circ.get_unitary(), expected_circ.get_unitary())
+
+
+def test_template_vectorised_binding() -> None:
+    pauli_op = tensor_from_x_index(x_index=0, n_qubits=3)
+    template = CliffordTemplate(
+        PhasePolyBox(build_phase_poly_circuit(a, b)),
+        pauli_op,
+    )
+    alphas = np.array([alpha for alpha, _ in bindings])
+    betas = np.array([beta for _, beta in bindings])
+    angles = template.get_angles({a: alphas, b: betas})
+    assert angles.shape == (len(bindings), template.n_gadgets)
+    circuits = template.bind_all({a: alphas, b: betas})
+    for circ, (alpha, beta) in zip(circuits, bindings):
+        single_circ = template.bind({a: alpha, b: beta})
+        assert compare_unitaries(circ.get_unitary(), single_circ.get_unitary())
+
+
+@pytest.mark.parametrize("alpha, beta", bindings)
+def test_symbolic_synthesise_clifford(alpha: float, beta: float) -> None:
+    # synthesise_clifford accepts a symbolic PhasePolyBox directly.
+    pauli_op = tensor_from_x_index(x_index=2, n_qubits=3)
+    symbolic_circ = synthesise_clifford(
+        pbox=PhasePolyBox(build_phase_poly_circuit(a, b)),
+        input_pauli=pauli_op,
+    )
+    assert symbolic_circ.free_symbols()
+    expected_circ = synthesise_clifford(
+        pbox=PhasePolyBox(build_phase_poly_circuit(alpha, beta)),
+        input_pauli=pauli_op,
+    )
+    bound_circ = bind_circuit(symbolic_circ, {a: alpha, b: beta})
+    assert compare_unitaries(bound_circ.get_unitary(), expected_circ.get_unitary())
+
+
+def test_symbolic_verify_needs_bindings() -> None:
+    pbox = PhasePolyBox(build_phase_poly_circuit(a, b))
+    pauli_op = tensor_from_x_index(x_index=2, n_qubits=3)
+    with pytest.raises(ValueError, match="free symbols"):
+        synthesise_clifford(pbox=pbox, input_pauli=pauli_op, verify=True)
+
+
+def test_template_missing_symbol() -> None:
+    template = CliffordTemplate(
+        PhasePolyBox(build_phase_poly_circuit(a, b)),
+        tensor_from_x_index(x_index=1, n_qubits=3),
+    )
+    with pytest.raises(ValueError):
+        template.bind({a: 0.25})
+
+
+def test_symbolic_gadgetisation() -> None:
+    box_0 = PhasePolyBox(build_phase_poly_circuit(a, b))
+    box_1 = PhasePolyBox(build_phase_poly_circuit(b, 0.25))
+    circ = Circuit(3).add_gate(box_0, [0, 1, 2]).H(1).add_gate(box_1, [0, 1, 2])
+    REPLACE_HADAMARDS.apply(circ)
+    assert circ.n_gates_of_type(OpType.Measure) == 1
+
+    concrete_circ = Circuit(3)
+    concrete_circ.add_gate(
+        PhasePolyBox(build_phase_poly_circuit(0.25, 0.75)), [0, 1, 2]
+    )
+    concrete_circ.H(1)
+    concrete_circ.add_gate(
+        PhasePolyBox(build_phase_poly_circuit(0.75, 0.25)), [0, 1, 2]
+    )
+    REPLACE_HADAMARDS.apply(concrete_circ)
+
+    bound_circ = bind_circuit(circ, {a: 0.25, b: 0.75})
+    assert not bound_circ.free_symbols()
+    assert bound_circ.get_commands() == concrete_circ.get_commands()
+
+
+def test_rz_angle_checking_with_symbols() -> None:
+    circ = Circuit(2).CX(0, 1).Rz(a, 1).Rz(0.25, 0)
+    with pytest.raises(ValueError):
+        check_rz_angles(circ)
+    assert check_rz_angles(circ, allow_symbols=True)
+    circ.Rz(0.3, 0)
+    assert not check_rz_angles(circ, allow_symbols=True)
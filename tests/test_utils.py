@@ -8,6 +8,7 @@ from pytket._tket.circuit import Circuit, PhasePolyBox, OpType
 from pytket.qasm.qasm import circuit_from_qasm
 from pytket._tket.unit_id import Bit, Qubit
 from pytket.predicates import GateSetPredicate
+from pytket.utils import compare_unitaries
 from glob import glob
 import pytest
 
@@ -81,3 +82,14 @@ def test_t_replacement(qasm_file: str) -> None:
     phase_poly_circ = circuit_from_qasm(qasm_file)
     REPLACE_T_WITH_RZ.apply(phase_poly_circ)
     assert CNOT_RZ_PREDICATE.verify(phase_poly_circ)
+
+
+def test_t_replacement_gates_and_registers() -> None:
+    circ = Circuit()
+    qreg = circ.add_q_register("data", 2)
+    circ.T(qreg[0]).Tdg(qreg[1]).CX(qreg[0], qreg[1]).S(qreg[1]).Sdg(qreg[0])
+    rz_circ = circ.copy()
+    REPLACE_T_WITH_RZ.apply(rz_circ)
+    assert rz_circ.qubits == list(qreg)
+    assert GateSetPredicate({OpType.CX, OpType.Rz}).verify(rz_circ)
+    assert compare_unitaries(circ.get_unitary(), rz_circ.get_unitary())
@@ -0,0 +1,74 @@
+from glob import glob
+
+import pytest
+from pytket import Qubit
+from pytket._tket.circuit import Circuit, PhasePolyBox
+from pytket.pauli import Pauli, QubitPauliTensor
+from pytket.qasm.qasm import circuit_from_qasm
+from pytket.utils import compare_unitaries
+
+from topt_proto.clifford import synthesise_clifford
+from topt_proto.utils import tensor_from_x_index, REPLACE_T_WITH_RZ
+from topt_proto.verification import get_clifford_tableau, verify_clifford_synthesis
+
+from circuit_builders import build_random_phase_poly_circuit
+
+
+circuit_files = glob("qasm/*.qasm")
+
+paulis = [Pauli.X, Pauli.Y, Pauli.Z]
+
+
+def single_qubit_pauli(pauli: Pauli, index: int, n_qubits: int) -> QubitPauliTensor:
+    qubit_list = [Qubit(n) for n in range(n_qubits)]
+    pauli_list = [pauli if n == index else Pauli.I for n in range(n_qubits)]
+    return QubitPauliTensor(qubits=qubit_list, paulis=pauli_list)
+
+
+@pytest.mark.parametrize("qasm_file", circuit_files)
+@pytest.mark.parametrize("pauli", paulis)
+def test_tableau_verification(qasm_file: str, pauli: Pauli) -> None:
+    phase_poly_circ = circuit_from_qasm(qasm_file)
+    REPLACE_T_WITH_RZ.apply(phase_poly_circ)
+    phase_poly_box = PhasePolyBox(phase_poly_circ)
+    n_qubits = phase_poly_circ.n_qubits
+    for index in range(n_qubits):
+        pauli_op = single_qubit_pauli(pauli, index, n_qubits)
+        clifford_circ = synthesise_clifford(pbox=phase_poly_box, input_pauli=pauli_op)
+        assert verify_clifford_synthesis(phase_poly_box, pauli_op, clifford_circ)
+        # A single extra gate should be detected.
+        clifford_circ.S(index)
+        assert not verify_clifford_synthesis(phase_poly_box, pauli_op, clifford_circ)
+
+
+def test_clifford_tableau() -> None:
+    circ_0 = Circuit(3).H(0).CX(0, 1).S(1).CZ(1, 2).SWAP(0, 2).V(1)
+    circ_1 = Circuit(3).H(0).CX(0, 1).Rz(0.5, 1).H(2).CX(1, 2).H(2)
+    circ_1.SWAP(0, 2).H(1).S(1).H(1)
+    assert compare_unitaries(circ_0.get_unitary(), circ_1.get_unitary())
+    assert get_clifford_tableau(circ_0) == get_clifford_tableau(circ_1)
+    circ_1.Z(0)
+    assert get_clifford_tableau(circ_0) != get_clifford_tableau(circ_1)
+
+
+@pytest.mark.parametrize("n_qubits", [30, 100])
+def test_wide_clifford_verification(n_qubits: int) -> None:
+    phase_poly_circ = build_random_phase_poly_circuit(
+        n_qubits, 4 * n_qubits, seed=n_qubits
+    )
+    phase_poly_box = PhasePolyBox(phase_poly_circ)
+    pauli_op = tensor_from_x_index(x_index=n_qubits // 2, n_qubits=n_qubits)
+    clifford_circ = synthesise_clifford(
+        pbox=phase_poly_box,
+        input_pauli=pauli_op,
+        verify=True,
+    )
+    assert clifford_circ.n_qubits == n_qubits
+
+
+def test_non_clifford_conjugation() -> None:
+    # Rz(1/8) is not Clifford, so U† X U is not Clifford either.
+    circ = Circuit(2).CX(0, 1).Rz(0.125, 1).CX(0, 1)
+    pauli_op = tensor_from_x_index(x_index=0, n_qubits=2)
+    clifford_circ = Circuit(2).X(0)
+    assert not verify_clifford_synthesis(PhasePolyBox(circ), pauli_op, clifford_circ)